@@ -0,0 +1,144 @@
+import numpy as np
+import sys
+
+from cross_sections import get_cross_section, get_cross_section_on_grid
+from get_cross_section_v2r4 import eps_1, eps_max
+from get_interaction_length import c, mbarn, Mpc, MeV
+import instrumentation
+from photon_fields import I
+from v2r4_table import parameters
+
+# Error-controlled evaluation of the rate c/(2 Gmm^2) int eps sigma(eps) I(eps, Gmm) deps for one Gmm at a time.
+# The integral is done in x = ln(eps) with 7-15 point Gauss-Kronrod rules on intervals whose edges sit on
+# every non-smooth point of the cross section (v2r4: thresholds t, Gaussian peaks x1, the step at eps_1 and
+# the cut at eps_max; TENDL-2023: the nodes of the table), so each rule only sees a smooth integrand.
+# Intervals are bisected, worst estimated error first, until the summed |K15 - G7| is within tolerance.
+
+rtol = 1.e-6
+max_intervals = 5000
+
+# Kronrod nodes on [-1, 1] (the odd ones are the Gauss nodes) and weights of the 15- and 7-point rules
+nodes_K15 = np.array([0.991455371120812639, 0.949107912342758525, 0.864864423359769073, 0.741531185599394440,
+                      0.586087235467691130, 0.405845151377397167, 0.207784955007898468, 0.000000000000000000])
+weights_K15 = np.array([0.022935322010529225, 0.063092092629978553, 0.104790010322250184, 0.140653259715525919,
+                        0.169004726639267903, 0.190350578064785410, 0.204432940075298892, 0.209482141084727828])
+weights_G7 = np.array([0.129484966168869693, 0.279705391489276668, 0.381830050505118945, 0.417959183673469388])
+
+nodes_K15 = np.concatenate([-nodes_K15, nodes_K15[-2::-1]])
+weights_K15 = np.concatenate([weights_K15, weights_K15[-2::-1]])
+weights_G7 = np.concatenate([weights_G7, weights_G7[-2::-1]])
+
+# ----------------------------------------------------------------------------------------------------
+def gauss_kronrod(f, a, b):
+
+    # K15 estimate and |K15 - G7| error on every interval [a_i, b_i], with one vectorized call of f
+    center = 0.5 * (a + b)
+    half_width = 0.5 * (b - a)
+    values = f(center[:, None] + half_width[:, None] * nodes_K15[None, :])
+
+    integral_K15 = half_width * (values @ weights_K15)
+    integral_G7 = half_width * (values[:, 1::2] @ weights_G7)
+
+    return integral_K15, np.abs(integral_K15 - integral_G7)
+
+# ----------------------------------------------------------------------------------------------------
+def integrate_adaptive(f, breakpoints, rtol = rtol, atol = 0., max_intervals = max_intervals):
+
+    # Integral of f over [breakpoints[0], breakpoints[-1]], its error estimate and the number of evaluations of f
+    breakpoints = np.unique(breakpoints)
+    a, b = breakpoints[:-1], breakpoints[1:]
+    integral, error = gauss_kronrod(f, a, b)
+    num_evaluations = len(nodes_K15) * len(a)
+
+    while error.sum() > max(atol, rtol * abs(integral.sum())):
+
+        if len(a) >= max_intervals:
+            print(f'Warning: no convergence with {len(a)} intervals, estimated error {error.sum():.2e}')
+            break
+
+        # Bisect every interval carrying more than its share of the allowed error, and at least the worst one
+        tolerance = max(atol, rtol * abs(integral.sum())) * (b - a) / (breakpoints[-1] - breakpoints[0])
+        split = (error > tolerance) | (error == error.max())
+        split &= np.cumsum(split) <= max_intervals - len(a)
+
+        middle = 0.5 * (a[split] + b[split])
+        a_new = np.concatenate([a[split], middle])
+        b_new = np.concatenate([middle, b[split]])
+        integral_new, error_new = gauss_kronrod(f, a_new, b_new)
+        num_evaluations += len(nodes_K15) * len(a_new)
+
+        a, b = np.concatenate([a[~split], a_new]), np.concatenate([b[~split], b_new])
+        integral, error = np.concatenate([integral[~split], integral_new]), np.concatenate([error[~split], error_new])
+
+    return integral.sum(), error.sum(), num_evaluations
+
+# ----------------------------------------------------------------------------------------------------
+def cross_section_breakpoints(A, Z, xs_model):
+
+    # Energies [MeV] where the total cross section is not smooth, the first and last being the range where it is > 0:
+    # from the lowest threshold t of a Gaussian part (h1 > 0, t < eps_1), or eps_1, up to eps_max, or eps_1 if c = 0
+    if xs_model == 'v2r4':
+        points = [eps_1, eps_max]
+        lower, upper = eps_1, eps_1
+        for ipart in ['N', 'alpha']:
+            t, h1, x1, w1, c_ipart = parameters(A, Z, ipart)
+            points += [t, x1] if h1 > 0 else [eps_1]
+            if h1 > 0 and t < eps_1:
+                lower = min(lower, t)
+            if c_ipart > 0:
+                upper = eps_max
+
+        if not lower < upper:
+            return np.zeros(0)
+
+        points = np.array(points, dtype = float)
+        points = points[np.isfinite(points)]
+
+        return np.unique(np.clip(points, lower, upper))
+
+    return np.asarray(get_cross_section(A, Z, xs_model)[0], dtype = float)
+
+# ----------------------------------------------------------------------------------------------------
+def interaction_rate_adaptive(A, Z, Gmm, xs_model, rtol = rtol, atol = 0., field_names = ('CMB',)):
+
+    # Interaction rate [1/s] with its error estimate [1/s] and the number of cross-section/kernel evaluations
+    breakpoints = cross_section_breakpoints(A, Z, xs_model)
+
+    if len(breakpoints) < 2:
+        return 0., 0., 0
+
+    def integrand(lneps):
+        eps = np.exp(lneps)
+        sigma = get_cross_section_on_grid(A, Z, xs_model, eps.ravel()).reshape(eps.shape)
+        return c / (2 * Gmm**2) * (eps * MeV)**2 * sigma * mbarn * I(eps * MeV, Gmm, field_names)
+
+    with instrumentation.stage('integrate.adaptive'):
+        integral, error, n_eval = integrate_adaptive(integrand, np.log(breakpoints), rtol, atol)
+
+    instrumentation.count('integrate.adaptive.evaluations', n_eval)
+
+    return integral, error, n_eval
+
+# ----------------------------------------------------------------------------------------------------
+def interaction_lengths_adaptive(A, Z, Gmm, xs_model, rtol = rtol, field_names = ('CMB',)):
+
+    # Interaction lengths [Mpc] and their estimated relative errors for every Gmm
+    results = np.array([interaction_rate_adaptive(A, Z, Gmm_i, xs_model, rtol, 0., field_names) for Gmm_i in np.atleast_1d(Gmm)])
+    rates, errors = results[:, 0], results[:, 1]
+
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        return c * A / rates / Mpc, np.where(rates > 0, errors / rates, 0.)
+
+# ----------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    A = int(sys.argv[1])
+    Z = int(sys.argv[2])
+    xs_model = sys.argv[3] # v2r4 or TENDL-2023
+
+    Gmm = np.logspace(10, 13, num = 50) / A
+
+    for Gmm_i, interaction_length, relative_error in zip(Gmm, *interaction_lengths_adaptive(A, Z, Gmm, xs_model)):
+        print(Gmm_i, interaction_length, relative_error)
+
+# ----------------------------------------------------------------------------------------------------
@@ -0,0 +1,203 @@
+import argparse
+from contextlib import contextmanager
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+
+# Benchmarks of the cross-section and interaction-length hot paths, run offline on fixture data.
+#   python3 benchmarks.py                 run everything and compare with the baseline
+#   python3 benchmarks.py --save          run everything and record the results as the new baseline
+#   python3 benchmarks.py -k sweep        only the benchmarks whose name contains 'sweep'
+# The comparison is a local before/after check: save a baseline on a machine, change the code, and run again
+# on the same machine. A benchmark is a regression when its time exceeds the baseline by more than
+# --threshold (relative); the exit code is then 1, unless --save just recorded the results as the baseline.
+# Baselines are machine specific, so none is kept under version control, and without one the timings are
+# only printed.
+# The fixtures (a TENDL-2023 cache entry per nucleus, a set of exclusive-channel tables and a tabulated photon
+# field) are written to a temporary directory or registered, and the TENDL cache is pointed there in offline
+# mode only while the benchmarks run; importing this module changes nothing.
+
+import numpy as np
+
+import cross_sections
+from get_cross_section_v2r4 import cross_section_Model4
+from get_interaction_length import interaction_length
+import interaction_lengths
+import photon_fields
+from channel_observables import bundle_observables
+import tendl_cache
+from tendl_cache import write_entry
+from tendl_channels import pack_nucleus
+from v2r4_table import load_table
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../plots'))
+from utils import read_v2r4
+
+get_cross_section_TENDL = cross_sections.get_cross_section_TENDL
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+threshold = 0.25 # relative slowdown flagged as a regression
+repeat = 5
+
+fixture_nuclei = [[16, 8], [28, 14], [56, 26]]
+channel_nucleus = 'O16'
+num_channels = 200
+table_field = 'benchmark table' # the CMB density tabulated like an EBL model, for the interpolated-kernel path
+
+# ----------------------------------------------------------------------------------------------------
+@contextmanager
+def fixture_environment():
+
+    # Temporary fixture directory with an offline TENDL cache in it; everything is restored on exit
+    fixture_dir = tempfile.mkdtemp(prefix = 'luciana-benchmarks-')
+    saved = tendl_cache.CACHE_DIR, tendl_cache.OFFLINE
+    tendl_cache.CACHE_DIR, tendl_cache.OFFLINE = os.path.join(fixture_dir, 'cache'), True
+
+    try:
+        yield fixture_dir
+    finally:
+        tendl_cache.CACHE_DIR, tendl_cache.OFFLINE = saved
+        photon_fields.fields.pop(table_field, None)
+        for function in [cross_sections.get_cross_section, cross_sections.get_cross_section_TENDL2023]:
+            function.cache_clear() # the fixture tables must not outlive the fixtures
+        shutil.rmtree(fixture_dir, ignore_errors = True)
+
+# ----------------------------------------------------------------------------------------------------
+def make_fixtures(fixture_dir):
+
+    # TENDL-2023 nonelastic.tot files shaped like the v2r4 cross sections, on a TENDL-like energy grid
+    eps = np.concatenate([np.linspace(1., 30., 300), np.linspace(30.5, 200., 120)])
+    for A, Z in fixture_nuclei:
+        element = get_cross_section_TENDL.elements[Z]
+        sigma = cross_sections.get_cross_section_on_grid(A, Z, 'v2r4', eps)
+        text = '# fixture\n#   E        xs\n' + ''.join(f'{eps_i:.6e} {sigma_i:.6e}\n' for eps_i, sigma_i in zip(eps, sigma))
+        write_entry(f'{get_cross_section_TENDL.TENDL_URL}/{element}/{element}{A:03}/tables/xs/nonelastic.tot', 200, text.encode())
+
+    # Exclusive-channel tables of one nucleus, with random codes and Gaussian cross sections on their own grids
+    rng = np.random.default_rng(0)
+    directory = os.path.join(fixture_dir, 'TENDL2023', channel_nucleus)
+    os.makedirs(directory, exist_ok = True)
+    codes = set()
+    while len(codes) < num_channels:
+        codes.add(tuple(rng.multinomial(rng.integers(1, 6), [0.4, 0.3, 0.1, 0.05, 0.05, 0.1])))
+    for code in codes:
+        E = np.sort(rng.uniform(5., 200., rng.integers(50, 400)))
+        sigma = rng.uniform(0.1, 5.) * np.exp(-(E - rng.uniform(15., 40.))**2 / 200.)
+        np.savetxt(os.path.join(directory, f"talys_g_{channel_nucleus}_{''.join(str(i) for i in code)}.txt"), np.column_stack([E, sigma]))
+
+    # A photon field whose kernel is interpolated from a table, as for any field but the CMB
+    photon_fields.register_density(table_field, photon_fields.density_blackbody, 1.e-6, 1.e-1)
+
+# ----------------------------------------------------------------------------------------------------
+def benchmarks(fixture_dir):
+
+    # name -> function of no argument; sweeps are named '<what> sweep[<parameter>=<value>]'.
+    # get_cross_section is cached, so interaction_length[...] times the integration and 'TENDL-2023 parse' the reading.
+    tendl_dir = os.path.join(fixture_dir, 'TENDL2023')
+    eps = np.logspace(0, np.log10(200.), 2001) * 1.e6 # eV
+    Gmm = np.logspace(8, 11, 50)
+    table = load_table()[0]
+    all_nuclei = np.column_stack([table['A'], table['Z']])
+
+    cases = {
+        'read_v2r4': lambda: read_v2r4([56, 26]),
+        'cross_section_Model4': lambda: cross_section_Model4(56, 26, 'N'),
+        'TENDL-2023 parse': lambda: get_cross_section_TENDL.cross_section(56, 26),
+        'photon_fields.I[CMB, 2001 x 50]': lambda: photon_fields.I(eps[:, None], Gmm[None, :], ('CMB',)),
+        'photon_fields.I[table, 2001 x 50]': lambda: photon_fields.I(eps[:, None], Gmm[None, :], (table_field,)),
+        'kernel_matrix[CMB, 2001 x 50]': lambda: interaction_lengths.kernel_matrix(eps / 1.e6, Gmm, ('CMB',)),
+        'kernel_matrix[CMB + table, 2001 x 50]': lambda: interaction_lengths.kernel_matrix(eps / 1.e6, Gmm, ('CMB', table_field)),
+        'interaction_length[v2r4]': lambda: interaction_length(56, 26, 1.e10, 'v2r4'),
+        'interaction_length[TENDL-2023]': lambda: interaction_length(56, 26, 1.e10, 'TENDL-2023'),
+        'channel sum[pack]': lambda: pack_nucleus(channel_nucleus, tendl_dir),
+        'channel sum[observables]': lambda: bundle_observables(channel_nucleus, tendl_dir),
+    }
+
+    for num_nuclei in [1, 8, len(all_nuclei)]:
+        cases[f'interaction_lengths sweep[nuclei={num_nuclei}]'] = lambda num_nuclei = num_nuclei: \
+            interaction_lengths.interaction_lengths(all_nuclei[:num_nuclei], np.logspace(8, 11, 50), 'v2r4')
+    for num_Gmm in [10, 100, 1000]:
+        cases[f'interaction_lengths sweep[Gmm={num_Gmm}]'] = lambda num_Gmm = num_Gmm: \
+            interaction_lengths.interaction_lengths(fixture_nuclei, np.logspace(8, 11, num_Gmm), 'v2r4')
+    for num_eps in [501, 2001, 8001]:
+        cases[f'interaction_lengths sweep[eps={num_eps}]'] = lambda num_eps = num_eps: \
+            interaction_lengths.interaction_lengths(fixture_nuclei, np.logspace(8, 11, 50), 'v2r4', interaction_lengths.energy_grid(num = num_eps))
+
+    return cases
+
+# ----------------------------------------------------------------------------------------------------
+def measure(function):
+
+    # Best time per call [s] over repeat runs of as many calls as fit in ~0.2 s
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+
+    return min(timer.repeat(repeat = repeat, number = number)) / number
+
+# ----------------------------------------------------------------------------------------------------
+def run(pattern = '', baseline_file = BASELINE_FILE, save = False, threshold = threshold):
+
+    with fixture_environment() as fixture_dir:
+        make_fixtures(fixture_dir)
+        return _run(fixture_dir, pattern, baseline_file, save, threshold)
+
+# ----------------------------------------------------------------------------------------------------
+def _run(fixture_dir, pattern, baseline_file, save, threshold):
+
+    baseline = {}
+    if os.path.exists(baseline_file):
+        with open(baseline_file) as f:
+            baseline = json.load(f)['results']
+    elif not save:
+        print(f'No baseline in {os.path.relpath(baseline_file)} (create one with --save), timings are not compared')
+
+    results = {}
+    regressions = []
+
+    for name, function in benchmarks(fixture_dir).items():
+        if pattern not in name:
+            continue
+
+        results[name] = measure(function)
+
+        line = f'{name:<45} {results[name] * 1.e3:12.4f} ms'
+        if name in baseline:
+            ratio = results[name] / baseline[name]
+            line += f'   x{ratio:6.2f} vs baseline'
+            if ratio > 1. + threshold:
+                line += '   REGRESSION'
+                regressions.append(name)
+        print(line)
+
+    if save:
+        with open(baseline_file, 'w') as f:
+            json.dump({'machine': platform.node(), 'python': platform.python_version(), 'numpy': np.__version__,
+                       'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': {**baseline, **results}}, f, indent = 1, sort_keys = True)
+        print(f'Baseline saved to {os.path.relpath(baseline_file)}')
+
+    if regressions:
+        print(f'{len(regressions)} regression(s) beyond {100 * threshold:.0f} %: {", ".join(regressions)}')
+
+    return regressions
+
+# ----------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description = 'Benchmarks of the cross-section and interaction-length hot paths')
+    parser.add_argument('-k', dest = 'pattern', default = '', help = 'only run benchmarks whose name contains this string')
+    parser.add_argument('--baseline', default = BASELINE_FILE, help = 'baseline file (JSON)')
+    parser.add_argument('--save', action = 'store_true', help = 'record the results in the baseline file')
+    parser.add_argument('--threshold', type = float, default = threshold, help = 'relative slowdown flagged as a regression')
+    arguments = parser.parse_args()
+
+    regressions = run(arguments.pattern, arguments.baseline, arguments.save, arguments.threshold)
+
+    sys.exit(1 if regressions and not arguments.save else 0)
+
+# ----------------------------------------------------------------------------------------------------
@@ -0,0 +1,74 @@
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import expm_multiply
+
+from get_interaction_length import c, Mpc
+from model_comparison import adiabatic_length
+from propagation import build_channel_tables, max_step, mp
+
+# Deterministic counterpart of propagation.py for the mean composition. Photodisintegration keeps Gmm and
+# adiabatic losses lower it by the same factor for every fragment, so for one injection energy all nuclei
+# share Gmm(x) = Gmm_0 exp(-x H0/c) and the abundances n (one entry per row of the channel tables) obey
+#   dn/dx = M(Gmm(x)) n,   M[fragment, nucleus] = rate of the channel [1/Mpc],   M[nucleus, nucleus] = -total rate
+# which is integrated with sparse matrix exponentials over steps no longer than max_step, with M taken at the
+# Gmm of the middle of each step. An injection spectrum is the average of one such solution per energy.
+
+# ----------------------------------------------------------------------------------------------------
+def transition_matrix(tables, lnGmm):
+
+    # Sparse (nucleus x nucleus) transition-rate matrix [1/Mpc] at ln(Gmm), rates interpolated linearly on the grid
+    grid = tables['lnGmm']
+    x = np.clip((lnGmm - grid[0]) / (grid[1] - grid[0]), 0., len(grid) - 1.)
+    i = min(int(x), len(grid) - 2)
+    rates = ((1. - (x - i)) * tables['rates'][:, :, i] + (x - i) * tables['rates'][:, :, i + 1]) * Mpc / c
+
+    nucleus, channel = np.nonzero(tables['products'] >= 0)
+    num_nuclei = len(tables['A'])
+
+    gains = sparse.csr_matrix((rates[nucleus, channel], (tables['products'][nucleus, channel], nucleus)), shape = (num_nuclei, num_nuclei))
+
+    return gains - sparse.diags(rates.sum(axis = 1))
+
+# ----------------------------------------------------------------------------------------------------
+def evolve(tables, row, Gmm, distances):
+
+    # Abundances (distance x nucleus) of a single nucleus injected in the given row with Lorentz factor Gmm
+    n = np.zeros(len(tables['A']))
+    n[row] = 1.
+
+    abundances = np.empty((len(distances), len(n)))
+    x = 0.
+
+    for idistance, distance in enumerate(distances):
+        num_steps = max(1, int(np.ceil((distance - x) / max_step)))
+        step = (distance - x) / num_steps
+
+        for istep in range(num_steps):
+            lnGmm = np.log(Gmm) - (x + (istep + 0.5) * step) / adiabatic_length
+            n = expm_multiply(transition_matrix(tables, lnGmm) * step, n)
+
+        x = distance
+        abundances[idistance] = n
+
+    return abundances
+
+# ----------------------------------------------------------------------------------------------------
+def cascade_mean_lnA(A, Z, E, distances, model = 'v2r4', tables = None):
+
+    # <lnA> and its spread vs distance [Mpc] for nuclei (A, Z) injected with the energies E [eV], equally weighted
+    E = np.atleast_1d(np.asarray(E, dtype = float))
+    tables = tables or build_channel_tables([[A, Z]], model)
+    distances = np.asarray(distances, dtype = float)
+
+    row = np.flatnonzero((tables['A'] == A) & (tables['Z'] == Z))[0]
+    lnA = np.log(tables['A'])
+
+    # Repeated energies (e.g. a monoenergetic beam given as an array) are only solved once
+    energies, counts = np.unique(E, return_counts = True)
+    abundances = sum(count * evolve(tables, row, energy / (A * mp), distances) for energy, count in zip(energies, counts)) / len(E)
+
+    mean = abundances @ lnA
+
+    return mean, np.sqrt(np.clip(abundances @ lnA**2 - mean**2, 0., None))
+
+# ----------------------------------------------------------------------------------------------------
@@ -0,0 +1,104 @@
+import re
+import warnings
+
+import numpy as np
+from scipy import sparse
+
+from resampling import resample
+from tendl_channels import TENDL_DIR, load_bundle
+
+# Every observable of the exclusive-channel analyses is a weighted sum over channels, sum_k w_k sigma_k(E).
+# The weights only depend on the channel codes (n, p, d, t, h, alpha), so all observables of all nuclei
+# follow from one (observable x channel) weight matrix times the (channel x energy) cross-section matrix.
+#   total           all channels
+#   multiplicity_k  channels emitting k particles, for k = 1 up to the largest multiplicity among the channels
+#   nprod           neutron production (n multiplicity)
+#   N               nucleons emitted as n, p, d, t (the N channel of v2r4)
+#   alpha           h + alpha (the alpha channel of v2r4)
+#   lnA             ln(residual A), so that lnA / total = <ln A> of the fragment
+# A channel that breaks the nucleus up completely (residual A = 0) has no fragment and adds nothing to lnA.
+# A channel emitting more nucleons than the nucleus has (residual A < 0, an inconsistent code) is dropped
+# from every observable with a warning.
+
+# ----------------------------------------------------------------------------------------------------
+def count_nucleons(i_n, i_p, i_d, i_t, i_h, i_a):
+
+    return (i_n + i_p) + 2 * i_d + 3 * (i_t + i_h) + 4 * i_a
+
+# ----------------------------------------------------------------------------------------------------
+def nucleus_A(nucleus):
+
+    # Mass number from a bundle name such as 'O16' or 'Fe56'
+    match = re.fullmatch(r'([A-Z][a-z]?)(\d+)', nucleus)
+
+    if not match:
+        raise ValueError(f'Cannot read the mass number from nucleus name {nucleus}')
+
+    return int(match.group(2))
+
+# ----------------------------------------------------------------------------------------------------
+def largest_multiplicity(codes):
+
+    codes = np.asarray(codes, dtype = int).reshape(-1, 6)
+
+    return int(codes.sum(axis = 1).max()) if len(codes) else 0
+
+# ----------------------------------------------------------------------------------------------------
+def observable_names(max_multiplicity):
+
+    return ['total'] + [f'multiplicity_{k}' for k in range(1, max_multiplicity + 1)] + ['nprod', 'N', 'alpha', 'lnA']
+
+# ----------------------------------------------------------------------------------------------------
+def weight_matrix(codes, A, max_multiplicity = None):
+
+    # (observable x channel) weights, in the order of observable_names(max_multiplicity); max_multiplicity
+    # defaults to the largest one among codes
+    codes = np.asarray(codes, dtype = float).reshape(-1, 6)
+    max_multiplicity = largest_multiplicity(codes) if max_multiplicity is None else max_multiplicity
+
+    i_n, i_p, i_d, i_t, i_h, i_a = codes.T
+    multiplicity = i_n + i_p + i_d + i_t + i_h + i_a
+    residual_A = A - count_nucleons(i_n, i_p, i_d, i_t, i_h, i_a)
+
+    valid = residual_A >= 0
+    if not np.all(valid):
+        warnings.warn(f'Dropping channels emitting more than A = {A} nucleons: '
+                      + ', '.join(''.join(str(int(i)) for i in code) for code in codes[~valid]))
+
+    weights = [np.ones_like(i_n)]
+    weights += [(multiplicity == k).astype(float) for k in range(1, max_multiplicity + 1)]
+    weights += [i_n, i_n + i_p + 2. * i_d + 3. * i_t, i_h + i_a, np.log(np.maximum(residual_A, 1.))]
+
+    return np.array(weights) * valid # observable x channel
+
+# ----------------------------------------------------------------------------------------------------
+def bundle_observables(nucleus, tendl_dir = TENDL_DIR):
+
+    # Every observable of one nucleus on its own energy grid: E [MeV], {name: sigma [mb]}
+    E, codes, sigma = load_bundle(nucleus, tendl_dir)
+    values = weight_matrix(codes, nucleus_A(nucleus)) @ sigma
+
+    return np.asarray(E), dict(zip(observable_names(largest_multiplicity(codes)), values))
+
+# ----------------------------------------------------------------------------------------------------
+def chart_observables(nuclei, E = None, tendl_dir = TENDL_DIR):
+
+    # Every observable of many nuclei on a common energy grid [MeV] (default: union of the bundle grids)
+    # with one sparse block-diagonal matrix product; returns E, {name: (nucleus x energy) array}
+    bundles = [load_bundle(nucleus, tendl_dir) for nucleus in nuclei]
+
+    if E is None:
+        E = np.unique(np.concatenate([np.asarray(bundle[0]) for bundle in bundles]))
+
+    # Multiplicities up to the largest one of all nuclei, so that every nucleus has the same observables
+    multiplicity = max(largest_multiplicity(codes) for _, codes, _ in bundles)
+    observables = observable_names(multiplicity)
+
+    sigma = np.vstack([resample(E_bundle, sigma_bundle, E) for E_bundle, _, sigma_bundle in bundles])
+    weights = sparse.block_diag([weight_matrix(codes, nucleus_A(nucleus), multiplicity) for nucleus, (_, codes, _) in zip(nuclei, bundles)], format = 'csr')
+
+    values = (weights @ sigma).reshape(len(nuclei), len(observables), len(E))
+
+    return E, {name: values[:, iobservable] for iobservable, name in enumerate(observables)}
+
+# ----------------------------------------------------------------------------------------------------
@@ -0,0 +1,182 @@
+import importlib
+import os
+import re
+import sys
+
+import numpy as np
+
+import get_interaction_length
+import interaction_lengths as interaction_lengths_module
+from interaction_lengths import interaction_lengths
+from pipeline import fingerprint, interaction_length_sources, source_fingerprint
+from tendl_cache import cached_entries, cached_urls
+from v2r4_table import load_table
+
+get_cross_section_TENDL = importlib.import_module('get_cross_section_TENDL-2023')
+
+# Interaction lengths of the whole nuclear chart on one logarithmic Gmm grid, for propagation codes:
+#   python3 chart_table.py [v2r4|TENDL-2023]   builds ../results/interaction-length/chart/chart_<model>.npz
+#   table = load_chart('v2r4'); table(A, Z, E)  interaction lengths [Mpc] for arrays of nuclei and energies [eV]
+# Queries are linear interpolations of ln(lambda) in ln(Gmm) on the uniform grid, so locating a point is
+# one multiply-and-floor instead of a search, and millions of (A, Z, E) triples take a few array passes.
+# With 100 points per decade they agree with a direct evaluation to better than 0.1 % for lambda < 1e4 Mpc
+# (beyond the adiabatic length), 0.2 % up to 1e10 Mpc and 0.5 % up to 1e30 Mpc; longer interaction lengths,
+# approaching the 1e100 Mpc cap, are only right to within a factor of order one, which is irrelevant for
+# propagation. Energies must be positive, and energies outside the Gmm grid give NaN.
+# A chart records the fingerprint of its inputs (the cross-section inputs of its nuclei, the Gmm, eps and
+# photon-field constants and the source code, as in pipeline.py), and load_chart rebuilds it when they change.
+
+CHART_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../results/interaction-length/chart')
+
+mp = 1.e9 # 1 GeV
+
+Gmm_min = 1.e7
+Gmm_max = 1.e13
+points_per_decade = 100
+
+lambda_max = 1.e100 # Mpc, longer interaction lengths (no interactions at all) are stored as this and returned as inf
+
+chunk_size = 64 # nuclei per batched evaluation
+
+tendl_file = re.compile(r'/([A-Z][a-z]?)(\d{3})/tables/xs/nonelastic\.tot$')
+
+# ----------------------------------------------------------------------------------------------------
+def chart_filename(model, chart_dir = CHART_DIR):
+
+    return os.path.join(chart_dir, f'chart_{model}.npz')
+
+# ----------------------------------------------------------------------------------------------------
+def chart_nuclei(model):
+
+    # Every nucleus of the v2r4 parameter table, or every nucleus with a cached TENDL-2023 table
+    if model == 'v2r4':
+        table = load_table()[0]
+        return np.column_stack([table['A'], table['Z']])
+
+    if model == 'TENDL-2023':
+        Z_of = {element: Z for Z, element in get_cross_section_TENDL.elements.items()}
+        nuclei = [(int(match.group(2)), Z_of[match.group(1)]) for match in map(tendl_file.search, cached_urls())
+                  if match and match.group(1) in Z_of]
+        return np.array(sorted(set(nuclei)), dtype = int).reshape(-1, 2)
+
+    raise ValueError(f"Unknown cross-section model '{model}'. Please use 'v2r4' or 'TENDL-2023'.")
+
+# ----------------------------------------------------------------------------------------------------
+def chart_fingerprint(model, nuclei):
+
+    # The whole v2r4 table, or the checksums of the cached TENDL-2023 tables of the chart nuclei
+    if model == 'v2r4':
+        inputs = np.asarray(load_table()[0])
+    else:
+        urls = {f'{get_cross_section_TENDL.TENDL_URL}/{element}/{element}{int(A):03}/tables/xs/nonelastic.tot'
+                for element, A in ((get_cross_section_TENDL.elements.get(int(Z)), A) for A, Z in nuclei)}
+        inputs = [[meta['url'], meta['sha256']] for meta in cached_entries() if meta['url'] in urls]
+
+    photon_field = [get_interaction_length.c, get_interaction_length.hbar, get_interaction_length.kB, get_interaction_length.T0]
+    eps = [interaction_lengths_module.eps_min, interaction_lengths_module.eps_max, interaction_lengths_module.num_eps]
+
+    return fingerprint(model, np.asarray(nuclei, dtype = np.int64), inputs, photon_field, eps, [Gmm_min, Gmm_max, points_per_decade, lambda_max],
+                       source_fingerprint(interaction_length_sources + ['chart_table.py']))
+
+# ----------------------------------------------------------------------------------------------------
+def build_chart(model, nuclei = None, chart_dir = CHART_DIR):
+
+    nuclei = chart_nuclei(model) if nuclei is None else np.atleast_2d(nuclei)
+
+    if len(nuclei) == 0:
+        raise ValueError(f'No nuclei available for {model}')
+
+    num_Gmm = int(round(points_per_decade * np.log10(Gmm_max / Gmm_min))) + 1
+    lnGmm = np.linspace(np.log(Gmm_min), np.log(Gmm_max), num = num_Gmm)
+
+    ln_interaction_length = np.empty((len(nuclei), num_Gmm))
+    for start in range(0, len(nuclei), chunk_size):
+        interaction_length = interaction_lengths(nuclei[start:start + chunk_size], np.exp(lnGmm), model)
+        ln_interaction_length[start:start + chunk_size] = np.log(np.clip(interaction_length, None, lambda_max))
+
+    os.makedirs(chart_dir, exist_ok = True)
+    filename = chart_filename(model, chart_dir)
+    tmp_filename = filename + '.tmp.npz'
+    np.savez(tmp_filename, A = nuclei[:, 0], Z = nuclei[:, 1], lnGmm = lnGmm, ln_interaction_length = ln_interaction_length,
+             fingerprint = chart_fingerprint(model, nuclei))
+    os.replace(tmp_filename, filename)
+
+    return filename
+
+# ----------------------------------------------------------------------------------------------------
+class InteractionLengthTable:
+
+    def __init__(self, A, Z, lnGmm, ln_interaction_length):
+
+        self.A = np.asarray(A, dtype = int)
+        self.Z = np.asarray(Z, dtype = int)
+        self.lnGmm0 = lnGmm[0]
+        self.dlnGmm = lnGmm[1] - lnGmm[0]
+        self.num_Gmm = len(lnGmm)
+        self.ln_interaction_length = np.ascontiguousarray(ln_interaction_length)
+
+        # Dense (A, Z) -> row index, -1 for nuclei not in the table
+        self.index = np.full((self.A.max() + 1, self.Z.max() + 1), -1, dtype = np.int64)
+        self.index[self.A, self.Z] = np.arange(len(self.A))
+
+    def rows(self, A, Z):
+
+        inside = (A >= 0) & (A < self.index.shape[0]) & (Z >= 0) & (Z < self.index.shape[1])
+        rows = np.where(inside, self.index[np.where(inside, A, 0), np.where(inside, Z, 0)], -1)
+
+        if np.any(rows < 0):
+            raise ValueError(f'No interaction lengths tabulated for {np.count_nonzero(rows < 0)} of the requested nuclei')
+
+        return rows
+
+    def __call__(self, A, Z, E):
+
+        # Interaction lengths [Mpc] for broadcastable arrays of A, Z and energy E > 0 [eV]; NaN outside the Gmm grid
+        A, Z, E = np.broadcast_arrays(np.asarray(A, dtype = int), np.asarray(Z, dtype = int), np.asarray(E, dtype = float))
+        rows = self.rows(A, Z)
+
+        if not np.all(E > 0.):
+            raise ValueError(f'Energies must be positive, got {np.count_nonzero(~(E > 0.))} non-positive or NaN values')
+
+        x = (np.log(E / (A * mp)) - self.lnGmm0) / self.dlnGmm
+        inside = (x >= 0) & (x <= self.num_Gmm - 1)
+        i = np.clip(np.floor(x).astype(np.int64), 0, self.num_Gmm - 2)
+        t = x - i
+
+        table = self.ln_interaction_length
+        ln_interaction_length = (1. - t) * table[rows, i] + t * table[rows, i + 1]
+        interaction_length = np.exp(ln_interaction_length)
+
+        return np.where(inside, np.where(interaction_length >= lambda_max, np.inf, interaction_length), np.nan)
+
+# ----------------------------------------------------------------------------------------------------
+def load_chart(model, chart_dir = CHART_DIR):
+
+    # Lookup table of a model, (re)built first if it does not exist yet or its inputs changed since it was built
+    # An existing chart is kept when there are no inputs to rebuild it from (e.g. an empty TENDL-2023 cache)
+    filename = chart_filename(model, chart_dir)
+    nuclei = chart_nuclei(model)
+
+    if not os.path.exists(filename):
+        build_chart(model, nuclei, chart_dir)
+    elif len(nuclei) > 0:
+        with np.load(filename) as data:
+            stale = 'fingerprint' not in data or str(data['fingerprint']) != chart_fingerprint(model, nuclei)
+        if stale:
+            build_chart(model, nuclei, chart_dir)
+
+    with np.load(filename) as data:
+        return InteractionLengthTable(data['A'], data['Z'], data['lnGmm'], data['ln_interaction_length'])
+
+# ----------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    for model in sys.argv[1:] or ['v2r4', 'TENDL-2023']:
+        try:
+            filename = build_chart(model)
+        except ValueError as e:
+            print(f'{model}: {e}')
+            continue
+        print(f'{model}: {len(np.load(filename)["A"])} nuclei tabulated in {os.path.relpath(filename)}')
+
+# ----------------------------------------------------------------------------------------------------
@@ -0,0 +1,75 @@
+from functools import lru_cache
+import importlib
+import numpy as np
+
+from get_cross_section_v2r4 import cross_section_Model4
+import instrumentation
+from resampling import resample
+
+# The TENDL script name is not a valid identifier, so it cannot be imported with a plain import statement
+get_cross_section_TENDL = importlib.import_module('get_cross_section_TENDL-2023')
+
+xs_models = ['v2r4', 'TENDL-2023']
+
+# ----------------------------------------------------------------------------------------------------
+def _read_only(*arrays):
+
+    for array in arrays:
+        array.setflags(write = False)
+
+    return arrays
+
+# ----------------------------------------------------------------------------------------------------
+@lru_cache(maxsize = None)
+def get_cross_section_v2r4(A, Z, ipart):
+
+    eps, cross_section = cross_section_Model4(int(A), int(Z), ipart)
+
+    return _read_only(eps, cross_section) # MeV, mb
+
+# ----------------------------------------------------------------------------------------------------
+@lru_cache(maxsize = None)
+def get_cross_section_TENDL2023(A, Z):
+
+    # A failed fetch raises, and lru_cache does not cache exceptions, so the next call tries again
+    eps, cross_section = get_cross_section_TENDL.cross_section(int(A), int(Z))
+
+    return _read_only(eps, cross_section) # MeV, mb
+
+# ----------------------------------------------------------------------------------------------------
+@lru_cache(maxsize = None)
+def get_cross_section(A, Z, xs_model):
+
+    # Only runs on a cache miss
+    instrumentation.count('cross_section.cache_misses')
+
+    if xs_model == 'v2r4':
+        eps, cross_section_N = get_cross_section_v2r4(A, Z, 'N')
+        cross_section = cross_section_N + get_cross_section_v2r4(A, Z, 'alpha')[1]
+
+    elif xs_model == 'TENDL-2023':
+        eps, cross_section = get_cross_section_TENDL2023(A, Z)
+
+    else:
+        raise ValueError(f"Unknown cross-section model '{xs_model}'. Please use 'v2r4' or 'TENDL-2023'.")
+
+    mask = cross_section > 0
+
+    return _read_only(eps[mask], cross_section[mask]) # MeV, mb
+
+# ----------------------------------------------------------------------------------------------------
+def get_cross_section_on_grid(A, Z, xs_model, eps):
+
+    # Total cross section on a caller-supplied energy grid [MeV]: v2r4 is evaluated analytically,
+    # TENDL-2023 is interpolated linearly and set to zero outside the tabulated range
+    if xs_model == 'v2r4':
+        return cross_section_Model4(int(A), int(Z), 'N', eps)[1] + cross_section_Model4(int(A), int(Z), 'alpha', eps)[1] # mb
+
+    eps_table, cross_section = get_cross_section(A, Z, xs_model)
+
+    if len(eps_table) == 0:
+        return np.zeros_like(eps)
+
+    return resample(eps_table, cross_section, eps) # mb
+
+# ----------------------------------------------------------------------------------------------------
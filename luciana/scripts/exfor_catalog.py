@@ -0,0 +1,191 @@
+import importlib
+import json
+import os
+import re
+import sys
+import tempfile
+
+import numpy as np
+
+get_cross_section_TENDL = importlib.import_module('get_cross_section_TENDL-2023')
+
+# Catalog of the EXFOR measurements in tables/EXFOR/g_<nucleus>_<reaction>_<entry>.txt. Every file is parsed
+# once into a compiled store, rebuilt automatically when a file is added, removed or modified:
+#   cache/exfor.npy     (rows x 3) float64: photon energy [MeV], cross section [mb], uncertainty [mb]
+#                       (NaN where a file gives none, or a non-positive one)
+#   cache/exfor.json    one entry per file: nucleus, A, Z, reaction, EXFOR entry, offset and rows in
+#                       exfor.npy, and the reference parsed from its header comment
+# Queries are then by nucleus (and reaction) on the in-memory index, without scanning the directory.
+
+EXFOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../tables/EXFOR')
+CACHE_DIR = os.path.join(EXFOR_DIR, 'cache')
+
+filename_pattern = re.compile(r'^g_(?P<nucleus>(?P<element>[A-Z][a-z]?)(?P<A>\d+))_(?P<reaction>[A-Za-z]+)_(?P<entry>[A-Z0-9]+\.\d+)\.txt$')
+
+symbols = {element: Z for Z, element in get_cross_section_TENDL.elements.items()}
+
+_catalog = {}
+
+# ----------------------------------------------------------------------------------------------------
+def _source_files(exfor_dir):
+
+    return sorted(filename for filename in os.listdir(exfor_dir) if filename_pattern.match(filename))
+
+# ----------------------------------------------------------------------------------------------------
+def _stamps(exfor_dir):
+
+    stamps = {}
+
+    for filename in _source_files(exfor_dir):
+        stat = os.stat(os.path.join(exfor_dir, filename))
+        stamps[filename] = [stat.st_size, stat.st_mtime_ns]
+
+    return stamps
+
+# ----------------------------------------------------------------------------------------------------
+def parse_reference(header):
+
+    # '# Wyckoff+, Physical Review, volume 137, page B576, 1965' -> first author, et al. flag, year and
+    # a legend label ('Wyckoff et al. 1965')
+    citation = header.lstrip('#').strip()
+    author = citation.split(',')[0].strip()
+    et_al = author.endswith('+')
+    author = author.rstrip('+').split('.')[-1].strip() # drop initials, e.g. J.W.Norbury
+    years = re.findall(r'\b(1[89]\d\d|20\d\d)\b', citation)
+    year = int(years[-1]) if years else None
+
+    label = author + (' et al.' if et_al else '') + (f' {year}' if year else '')
+
+    return {'citation': citation, 'author': author, 'et_al': et_al, 'year': year, 'label': label}
+
+# ----------------------------------------------------------------------------------------------------
+def parse_file(filename):
+
+    # (reference, rows x 3 array) of one EXFOR file. Only the first three columns are used, and data
+    # lines may carry extra ones (e.g. '2 %' systematic uncertainties, flags).
+    reference = None
+    rows = []
+
+    with open(filename) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('#'):
+                if reference is None:
+                    reference = parse_reference(line)
+                continue
+            values = line.split()
+            rows.append([float(values[0]), float(values[1]), float(values[2]) if len(values) > 2 else np.nan])
+
+    data = np.array(rows, dtype = float).reshape(-1, 3)
+    data[~(data[:, 2] > 0.), 2] = np.nan
+
+    return reference or parse_reference(''), data
+
+# ----------------------------------------------------------------------------------------------------
+def compile_catalog(exfor_dir = EXFOR_DIR, cache_dir = CACHE_DIR):
+
+    entries = []
+    blocks = []
+    offset = 0
+
+    for filename in _source_files(exfor_dir):
+        match = filename_pattern.match(filename)
+        reference, data = parse_file(os.path.join(exfor_dir, filename))
+
+        entries.append({'file': filename, 'nucleus': match['nucleus'], 'A': int(match['A']), 'Z': symbols.get(match['element']),
+                        'reaction': match['reaction'], 'entry': match['entry'], 'offset': offset, 'rows': len(data), **reference})
+        blocks.append(data)
+        offset += len(data)
+
+    data = np.concatenate(blocks) if blocks else np.zeros((0, 3))
+    index = {'stamps': _stamps(exfor_dir), 'entries': entries}
+
+    os.makedirs(cache_dir, exist_ok = True)
+    for name, write in [('exfor.npy', lambda f: np.save(f, data)), ('exfor.json', lambda f: f.write(json.dumps(index, indent = 1).encode()))]:
+        fd, tmp = tempfile.mkstemp(dir = cache_dir, prefix = '.tmp-')
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, os.path.join(cache_dir, name))
+
+    return data, index
+
+# ----------------------------------------------------------------------------------------------------
+def load_catalog(exfor_dir = EXFOR_DIR, cache_dir = CACHE_DIR):
+
+    # (data, index) with data memory-mapped, compiling the catalog first if any source file changed.
+    # The sources are only checked on the first call of a process.
+    key = (os.path.abspath(exfor_dir), cache_dir)
+    if key in _catalog:
+        return _catalog[key]
+
+    stamps = _stamps(exfor_dir)
+
+    try:
+        with open(os.path.join(cache_dir, 'exfor.json')) as f:
+            index = json.load(f)
+        data = np.load(os.path.join(cache_dir, 'exfor.npy'), mmap_mode = 'r')
+        up_to_date = index['stamps'] == stamps and len(data) == sum(entry['rows'] for entry in index['entries'])
+    except (OSError, ValueError, KeyError):
+        up_to_date = False
+
+    if not up_to_date:
+        data, index = compile_catalog(exfor_dir, cache_dir)
+
+    _catalog[key] = (data, index)
+
+    return data, index
+
+# ----------------------------------------------------------------------------------------------------
+def _with_data(entry, data):
+
+    rows = data[entry['offset']:entry['offset'] + entry['rows']]
+
+    return dict(entry, E = rows[:, 0], sigma = rows[:, 1], sigma_error = rows[:, 2]) # MeV, mb, mb
+
+# ----------------------------------------------------------------------------------------------------
+def measurements(A, Z, reaction = 'abs', energy_range = None, exclude = (), exfor_dir = EXFOR_DIR, cache_dir = CACHE_DIR):
+
+    # Every measurement of nucleus (A, Z), sorted by year: its index entry plus E, sigma and sigma_error arrays.
+    # energy_range = (E_min, E_max) [MeV] keeps only the measurements with points in it, and exclude lists
+    # EXFOR entries (e.g. 'M0825.011') to leave out. Measurements sharing a label are told apart by their entry.
+    data, index = load_catalog(exfor_dir, cache_dir)
+    entries = [entry for entry in index['entries'] if entry['A'] == A and entry['Z'] == Z and entry['reaction'] == reaction
+               and entry['entry'] not in exclude]
+    selected = [_with_data(entry, data) for entry in sorted(entries, key = lambda entry: (entry['year'] or 0, entry['entry']))]
+
+    if energy_range is not None:
+        selected = [entry for entry in selected if np.any((entry['E'] >= energy_range[0]) & (entry['E'] <= energy_range[1]))]
+
+    labels = [entry['label'] for entry in selected]
+    for entry in selected:
+        if labels.count(entry['label']) > 1:
+            entry['label'] = f"{entry['label']} ({entry['entry']})"
+
+    return selected
+
+# ----------------------------------------------------------------------------------------------------
+def measurement(filename, exfor_dir = EXFOR_DIR, cache_dir = CACHE_DIR):
+
+    # The measurement stored in tables/EXFOR/<filename>
+    data, index = load_catalog(exfor_dir, cache_dir)
+
+    for entry in index['entries']:
+        if entry['file'] == os.path.basename(filename):
+            return _with_data(entry, data)
+
+    raise FileNotFoundError(f'No EXFOR measurement {filename} in {exfor_dir}')
+
+# ----------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    # List the catalog, or the measurements of one nucleus: python3 exfor_catalog.py [A Z]
+    data, index = load_catalog()
+    entries = measurements(int(sys.argv[1]), int(sys.argv[2])) if len(sys.argv) > 2 else index['entries']
+
+    for entry in entries:
+        print(f"{entry['nucleus']:6} {entry['reaction']:4} {entry['entry']:10} {entry['rows']:4} points   {entry['label']:22} {entry['citation']}")
+
+# ----------------------------------------------------------------------------------------------------
@@ -1,28 +1,18 @@
 import numpy as np 
 import sys
 
+from v2r4_table import parameters
+
 eps_1 = 30    # MeV
 eps_max = 150 # MeV
 
 # ----------------------------------------------------------------------------------------------------
-def cross_section_Model4(A, Z, ipart):
-
-    params = np.loadtxt('../../tables/v2r4/xsect_Gauss2_TALYS-restored.txt', skiprows = 2)
-
-    for irow in range(len(params)):
-        if params[irow, 0] == A and params[irow, 1] == Z:
-            break
-    else:
-        raise ValueError(f'No data found for A = {A} and Z = {Z}')
-
-    if ipart == 'N':
-        t, h1, x1, w1, c = params[irow, 2], params[irow, 3], params[irow, 4], params[irow, 5], params[irow, 6]
-    elif ipart == 'alpha':
-        t, h1, x1, w1, c = params[irow, 7], params[irow, 8], params[irow, 9], params[irow, 10], params[irow, 11]
-    else:
-        raise ValueError(f'Invalid particle type: {ipart}')
-    
-    eps = np.logspace(0, np.log10(eps_max), num = 500) 
+def cross_section_Model4(A, Z, ipart, eps = None):
+
+    t, h1, x1, w1, c = parameters(A, Z, ipart)
+
+    if eps is None:
+        eps = np.logspace(0, np.log10(eps_max), num = 500) 
     cross_section = np.zeros_like(eps)
 
     mask1 = (eps > t) & (eps < eps_1)
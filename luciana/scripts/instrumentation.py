@@ -0,0 +1,144 @@
+from contextlib import contextmanager
+import atexit
+import functools
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+# Opt-in stage timers and counters. Set LUCIANA_PROFILE=report.json (or call enable()) to record, per stage
+# (fetch, parse, integrate, write, ...), the number of calls and the total and longest wall time, plus
+# counters such as cache hits and bytes read, downloaded or written; the report is written as JSON when the
+# main process exits. Pool workers never run exit handlers, so work done in them is recorded with
+# collected() and returned to the parent, which merge()s it into its own report (run_interaction_length_jobs.py).
+# When disabled, stage() returns a shared no-op context manager and timed() functions cost one flag test.
+
+enabled = False
+report_file = None
+
+_stages = {}
+_counters = {}
+_start = time.perf_counter()
+
+# ----------------------------------------------------------------------------------------------------
+class _NullStage:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_null_stage = _NullStage()
+
+# ----------------------------------------------------------------------------------------------------
+@contextmanager
+def _timed_stage(name):
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stage = _stages.setdefault(name, {'calls': 0, 'total_s': 0., 'max_s': 0.})
+        stage['calls'] += 1
+        stage['total_s'] += elapsed
+        stage['max_s'] = max(stage['max_s'], elapsed)
+
+# ----------------------------------------------------------------------------------------------------
+def stage(name):
+
+    return _timed_stage(name) if enabled else _null_stage
+
+# ----------------------------------------------------------------------------------------------------
+def timed(name):
+
+    # Decorator recording every call of a function as the given stage
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return function(*args, **kwargs)
+            with _timed_stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+# ----------------------------------------------------------------------------------------------------
+def count(name, value = 1):
+
+    if enabled:
+        _counters[name] = _counters.get(name, 0) + value
+
+# ----------------------------------------------------------------------------------------------------
+@contextmanager
+def collected():
+
+    # Record the enclosed work separately: the yielded dict is filled with its stages and counters on exit
+    # (ready to be returned from a worker and merged in the parent), and they are also added to the tallies
+    # of this process
+    global _stages, _counters
+
+    stats = {}
+    saved = _stages, _counters
+    _stages, _counters = {}, {}
+
+    try:
+        yield stats
+    finally:
+        stats['stages'], stats['counters'] = _stages, _counters
+        _stages, _counters = saved
+        merge(stats)
+
+# ----------------------------------------------------------------------------------------------------
+def merge(stats):
+
+    # Add stages and counters recorded elsewhere (see collected) to the tallies of this process
+    for name, values in stats.get('stages', {}).items():
+        stage = _stages.setdefault(name, {'calls': 0, 'total_s': 0., 'max_s': 0.})
+        stage['calls'] += values['calls']
+        stage['total_s'] += values['total_s']
+        stage['max_s'] = max(stage['max_s'], values['max_s'])
+
+    for name, value in stats.get('counters', {}).items():
+        _counters[name] = _counters.get(name, 0) + value
+
+# ----------------------------------------------------------------------------------------------------
+def report():
+
+    return {'pid': os.getpid(), 'argv': sys.argv, 'wall_time_s': time.perf_counter() - _start,
+            'stages': {name: dict(values) for name, values in sorted(_stages.items())}, 'counters': dict(sorted(_counters.items()))}
+
+# ----------------------------------------------------------------------------------------------------
+def write_report(filename = None):
+
+    filename = filename or report_file
+
+    if multiprocessing.parent_process() is not None:
+        stem, extension = os.path.splitext(filename)
+        filename = f'{stem}.{os.getpid()}{extension}'
+
+    with open(filename, 'w') as f:
+        json.dump(report(), f, indent = 1)
+
+    return filename
+
+# ----------------------------------------------------------------------------------------------------
+def enable(filename = None):
+
+    # Start recording; the report is written to filename (if given) when the main process exits
+    global enabled, report_file
+
+    enabled = True
+
+    if filename and report_file is None and multiprocessing.parent_process() is None:
+        report_file = filename
+        atexit.register(write_report)
+
+# ----------------------------------------------------------------------------------------------------
+if os.environ.get('LUCIANA_PROFILE'):
+    enable(os.path.abspath(os.environ['LUCIANA_PROFILE']))
+
+# ----------------------------------------------------------------------------------------------------
@@ -0,0 +1,124 @@
+import sys
+
+import numpy as np
+
+from cross_sections import get_cross_section
+from get_interaction_length import c, Mpc
+from interaction_lengths import energy_grid, kernel_matrix
+from refit_v2r4 import model_matrix
+from resampling import resample
+from v2r4_table import parameters
+
+# Uncertainty bands on interaction lengths by sampling the cross section. Every sample is a row of a
+# (sample x energy) matrix on the shared grid eps, so the rates of all samples and all Lorentz factors are
+# one product with the kernel of interaction_lengths.kernel_matrix, and the bands are quantiles over samples.
+# Quantiles are taken on the rate and mapped to interaction lengths in reverse order, so that samples with
+# zero rate (an infinite interaction length) give infinite quantiles rather than NaN.
+# Cross-section samples come from
+#   v2r4          Gaussian draws of the (t, h1, x1, w1, c) parameters of N and alpha, evaluated in one batch
+#   tabulated     Gaussian draws of every point (TENDL-2023 with an assumed relative uncertainty, or an EXFOR
+#                 measurement with its own), optionally with a common normalization uncertainty, then
+#                 interpolated linearly onto eps with one sparse product (resampling.py). The cross section is
+#                 zero outside the tabulated range, so a measurement only constrains the rate it covers.
+
+quantiles = (0.16, 0.5, 0.84)
+num_samples = 1000
+
+# ----------------------------------------------------------------------------------------------------
+def sample_v2r4(A, Z, eps, num_samples = num_samples, relative_uncertainty = 0.1, seed = None):
+
+    # (sample x energy) total cross sections [mb] for v2r4 parameters drawn around their table values with the
+    # given relative standard deviation (a scalar, or one value per parameter t, h1, x1, w1, c)
+    rng = np.random.default_rng(seed)
+    eps = np.asarray(eps, dtype = float)
+    relative_uncertainty = np.broadcast_to(np.asarray(relative_uncertainty, dtype = float), (5,))
+
+    sigma = np.zeros((num_samples, len(eps)))
+
+    for ipart in ['N', 'alpha']:
+        central = np.asarray(parameters(A, Z, ipart), dtype = float)
+        params = central * (1. + relative_uncertainty * rng.standard_normal((num_samples, 5)))
+        params[:, 3] = np.abs(params[:, 3]) # Gaussian width w1 > 0
+        sigma += np.clip(model_matrix(eps, params), 0., None)
+
+    return sigma
+
+# ----------------------------------------------------------------------------------------------------
+def sample_points(E, sigma, sigma_error, eps, num_samples = num_samples, normalization_uncertainty = 0., seed = None):
+
+    # (sample x energy) cross sections [mb] on eps from tabulated points E [MeV], sigma [mb] with independent
+    # Gaussian errors sigma_error [mb] (NaN counts as zero) and a common relative normalization uncertainty
+    # Raises if no point lies on eps, as the sampled cross section would then be zero everywhere
+    rng = np.random.default_rng(seed)
+    E = np.asarray(E, dtype = float)
+    order = np.argsort(E)
+    E, sigma, sigma_error = E[order], np.asarray(sigma, dtype = float)[order], np.nan_to_num(np.asarray(sigma_error, dtype = float)[order])
+
+    if len(E) == 0:
+        raise ValueError('No tabulated cross-section points to sample')
+    if E[-1] < np.min(eps) or E[0] > np.max(eps):
+        raise ValueError(f'Tabulated cross section ({E[0]:g}-{E[-1]:g} MeV) does not overlap the energy grid ({np.min(eps):g}-{np.max(eps):g} MeV)')
+
+    points = sigma + sigma_error * rng.standard_normal((num_samples, len(E)))
+    points *= 1. + normalization_uncertainty * rng.standard_normal((num_samples, 1))
+
+    return resample(E, np.clip(points, 0., None), eps)
+
+# ----------------------------------------------------------------------------------------------------
+def rate_samples(sigma_samples, Gmm, eps, field_names = ('CMB',)):
+
+    # (sample x Gmm) interaction rates, up to the factor c * A / Mpc, of cross-section samples (sample x energy) on eps [MeV]
+    return sigma_samples @ kernel_matrix(eps, Gmm, field_names)
+
+# ----------------------------------------------------------------------------------------------------
+def interaction_length(A, rate):
+
+    # Interaction length [Mpc] of a rate of rate_samples, infinite where the rate is zero
+    with np.errstate(divide = 'ignore', over = 'ignore'):
+        return c * A / rate / Mpc
+
+# ----------------------------------------------------------------------------------------------------
+def interaction_length_samples(A, sigma_samples, Gmm, eps, field_names = ('CMB',)):
+
+    # (sample x Gmm) interaction lengths [Mpc] of cross-section samples (sample x energy) on eps [MeV]
+    return interaction_length(A, rate_samples(sigma_samples, Gmm, eps, field_names))
+
+# ----------------------------------------------------------------------------------------------------
+def interaction_length_bands(A, Z, Gmm, xs_model = 'v2r4', num_samples = num_samples, quantiles = quantiles, seed = None,
+                             relative_uncertainty = 0.1, normalization_uncertainty = 0., measurement = None, field_names = ('CMB',)):
+
+    # Quantiles (quantile x Gmm) of the interaction length [Mpc]. xs_model is 'v2r4' (parameters sampled with
+    # relative_uncertainty), 'TENDL-2023' (points sampled with relative_uncertainty) or 'EXFOR' (the points and
+    # uncertainties of measurement, an entry of exfor_catalog.measurements).
+    eps = energy_grid()
+
+    if xs_model == 'v2r4':
+        samples = sample_v2r4(A, Z, eps, num_samples, relative_uncertainty, seed)
+    elif xs_model == 'TENDL-2023':
+        E, sigma = get_cross_section(A, Z, xs_model)
+        samples = sample_points(E, sigma, relative_uncertainty * sigma, eps, num_samples, normalization_uncertainty, seed)
+    elif xs_model == 'EXFOR':
+        if measurement is None:
+            raise ValueError("xs_model 'EXFOR' needs a measurement (see exfor_catalog.measurements)")
+        samples = sample_points(measurement['E'], measurement['sigma'], measurement['sigma_error'], eps, num_samples, normalization_uncertainty, seed)
+    else:
+        raise ValueError(f"Unknown cross-section model '{xs_model}'. Please use 'v2r4', 'TENDL-2023' or 'EXFOR'.")
+
+    # The interaction length decreases with the rate: its quantile q is the length of the rate quantile 1 - q
+    rates = rate_samples(samples, Gmm, eps, field_names)
+
+    return interaction_length(A, np.quantile(rates, 1. - np.asarray(quantiles), axis = 0))
+
+# ----------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    A = int(sys.argv[1])
+    Z = int(sys.argv[2])
+    xs_model = sys.argv[3] # v2r4 or TENDL-2023
+
+    Gmm = np.logspace(10, 13, num = 50) / A
+
+    for Gmm_i, band in zip(Gmm, interaction_length_bands(A, Z, Gmm, xs_model, seed = 0).T):
+        print(Gmm_i, *band)
+
+# ----------------------------------------------------------------------------------------------------
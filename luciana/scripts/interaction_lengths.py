@@ -0,0 +1,119 @@
+import numpy as np
+import sys
+
+from cross_sections import get_cross_section_on_grid
+from get_interaction_length import c, mbarn, Mpc, MeV
+import instrumentation
+from photon_fields import I
+
+eps_min = 1.    # MeV
+eps_max = 200.  # MeV
+num_eps = 2001  # odd, for Simpson's rule
+
+# ----------------------------------------------------------------------------------------------------
+def energy_grid(eps_min = eps_min, eps_max = eps_max, num = num_eps):
+
+    return np.logspace(np.log10(eps_min), np.log10(eps_max), num = num) # MeV
+
+# ----------------------------------------------------------------------------------------------------
+def simpson_weights(num, dx):
+
+    if num % 2 == 0:
+        raise ValueError(f'Simpson weights need an odd number of points, got {num}')
+
+    weights = np.full(num, 2.)
+    weights[1::2] = 4.
+    weights[0] = weights[-1] = 1.
+
+    return weights * dx / 3.
+
+# ----------------------------------------------------------------------------------------------------
+def cross_section_matrix(nuclei, xs_model, eps):
+
+    # (nucleus x energy) matrix of total cross sections [mb] on the shared grid eps [MeV]
+    return np.array([get_cross_section_on_grid(A, Z, xs_model, eps) for A, Z in nuclei]).reshape(len(nuclei), len(eps))
+
+# ----------------------------------------------------------------------------------------------------
+def kernel_matrix(eps, Gmm, field_names = ('CMB',)):
+
+    # (energy x Gmm) matrix K such that sigma @ K gives the interaction rate [1/s] for sigma in mb,
+    # summed over the photon fields in field_names (see photon_fields.py).
+    # The integral is done with Simpson's rule in ln(eps), hence the extra factor eps in the weights.
+    eps = np.asarray(eps) * MeV
+    Gmm = np.atleast_1d(Gmm)
+    weights = simpson_weights(len(eps), np.log(eps[1] / eps[0])) * eps
+
+    return (weights * eps * mbarn)[:, None] * c / (2 * Gmm[None, :]**2) * I(eps[:, None], Gmm[None, :], field_names)
+
+# ----------------------------------------------------------------------------------------------------
+@instrumentation.timed('integrate')
+def interaction_rates(nuclei, Gmm, xs_model, eps = None, field_names = ('CMB',)):
+
+    eps = energy_grid() if eps is None else eps
+
+    return cross_section_matrix(nuclei, xs_model, eps) @ kernel_matrix(eps, Gmm, field_names) # 1/s
+
+# ----------------------------------------------------------------------------------------------------
+def interaction_lengths(nuclei, Gmm, xs_model, eps = None, field_names = ('CMB',)):
+
+    # Interaction lengths [Mpc] for every nucleus (rows) and Lorentz factor (columns) in one matrix product
+    nuclei = np.atleast_2d(nuclei)
+    A = nuclei[:, 0].astype(float)
+
+    with np.errstate(divide = 'ignore', over = 'ignore'):
+        return c * A[:, None] / interaction_rates(nuclei, Gmm, xs_model, eps, field_names) / Mpc
+
+# ----------------------------------------------------------------------------------------------------
+@instrumentation.timed('integrate.fft')
+def interaction_rates_fft(A, Z, xs_model, Gmm_min, Gmm_max, num, field_names = ('CMB',)):
+
+    # I(eps, Gmm) only depends on eps/Gmm, so on a grid uniform in x = ln(eps) and y = ln(Gmm) with a
+    # common step dx the rate is the correlation R(y_k) = c/(2 Gmm_k^2) sum_j f_j h_{j-k}, where
+    # f_j = w_j eps_j^2 sigma_j and h_m = I(eps_0/Gmm_0 e^{m dx}, 1), evaluated with one FFT.
+    # Rates more than ~1e-13 below the largest one are dominated by round-off and come out as zero.
+    lnGmm = np.linspace(np.log(Gmm_min), np.log(Gmm_max), num = num)
+    dx = lnGmm[1] - lnGmm[0]
+
+    num_eps = int(np.ceil(np.log(eps_max / eps_min) / dx)) + 1
+    lneps = np.log(eps_min * MeV) + dx * np.arange(num_eps)
+    eps = np.exp(lneps)
+
+    weights = np.full(num_eps, dx)
+    weights[0] = weights[-1] = dx / 2.
+    f = weights * eps**2 * get_cross_section_on_grid(A, Z, xs_model, eps / MeV) * mbarn
+
+    m = np.arange(-(num - 1), num_eps)
+    h = I(np.exp(lneps[0] - lnGmm[0] + m * dx), 1., field_names)
+
+    nfft = 1 << int(np.ceil(np.log2(num_eps + len(h) - 1)))
+    correlation = np.fft.irfft(np.fft.rfft(f, nfft) * np.fft.rfft(h[::-1], nfft), nfft)[num_eps - 1:num_eps - 1 + num]
+
+    cutoff = 1.e-13 * np.abs(correlation).max()
+    correlation[correlation < cutoff] = 0.
+
+    Gmm = np.exp(lnGmm)
+
+    return Gmm, c / (2 * Gmm**2) * correlation # 1/s
+
+# ----------------------------------------------------------------------------------------------------
+def interaction_lengths_fft(A, Z, xs_model, Gmm_min, Gmm_max, num = 10001, field_names = ('CMB',)):
+
+    # Interaction lengths [Mpc] on a dense logarithmic Gmm grid in O(N log N)
+    Gmm, rates = interaction_rates_fft(A, Z, xs_model, Gmm_min, Gmm_max, num, field_names)
+
+    with np.errstate(divide = 'ignore'):
+        return Gmm, c * A / rates / Mpc
+
+# ----------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    A = int(sys.argv[1])
+    Z = int(sys.argv[2])
+    xs_model = sys.argv[3] # v2r4 or TENDL-2023
+
+    Gmm = np.logspace(10, 13, num = 50) / A
+
+    for Gmm_i, interaction_length in zip(Gmm, interaction_lengths([[A, Z]], Gmm, xs_model)[0]):
+        print(Gmm_i, interaction_length)
+
+# ----------------------------------------------------------------------------------------------------
@@ -0,0 +1,110 @@
+import numpy as np
+import sys
+import warnings
+
+from get_interaction_length import c, Mpc
+from results_store import read_energy_interaction_length, read_interaction_length
+
+km = 1.e3          # m
+H0 = 70 * km / Mpc # 1/s
+
+adiabatic_length = c / H0 / Mpc # Mpc
+
+# ----------------------------------------------------------------------------------------------------
+def _interp_rows(x, xp, fp):
+
+    # np.interp applied row by row to (nucleus x point) arrays in a single call: every row is shifted
+    # along x by a multiple of a span larger than all rows, so the flattened grids stay sorted.
+    # Points outside the range of their own row are NaN.
+    span = max(x.max(), xp.max()) - min(x.min(), xp.min()) + 1.
+    shift = span * np.arange(len(x))[:, None]
+    values = np.interp(x + shift, (xp + shift).ravel(), fp.ravel())
+
+    return np.where((x >= xp.min(axis = 1)[:, None]) & (x <= xp.max(axis = 1)[:, None]), values, np.nan)
+
+# ----------------------------------------------------------------------------------------------------
+def _resample_curve(Gmm, E, interaction_length, num):
+
+    # One curve on num log-spaced Gmm over its own range; rates are interpolated linearly in ln(Gmm), as in align
+    Gmm_common = np.geomspace(Gmm[0], Gmm[-1], num = num)
+
+    with np.errstate(divide = 'ignore'):
+        rate = np.interp(np.log(Gmm_common), np.log(Gmm), 1. / interaction_length)
+        return Gmm_common, Gmm_common * (E[0] / Gmm[0]), 1. / rate
+
+# ----------------------------------------------------------------------------------------------------
+def load_curves(nuclei, model, field = 'CMB'):
+
+    # (nucleus x point) arrays of Gmm, E [eV] and interaction length [Mpc]. Curves of different lengths are
+    # first put on log-spaced Gmm grids over their own ranges, with as many points as the longest curve.
+    curves = []
+
+    for A, Z in nuclei:
+        Gmm = np.asarray(read_interaction_length(A, Z, model, field)[0])
+        E, interaction_length = (np.asarray(column) for column in read_energy_interaction_length(A, Z, model, field))
+        curves.append((Gmm, E, interaction_length))
+
+    num = max(len(Gmm) for Gmm, _, _ in curves)
+    if any(len(Gmm) != num for Gmm, _, _ in curves):
+        curves = [_resample_curve(*curve, num) for curve in curves]
+
+    Gmm, E, interaction_length = (np.array(column) for column in zip(*curves))
+
+    return Gmm, E, interaction_length
+
+# ----------------------------------------------------------------------------------------------------
+def align(Gmm, Gmm_model, interaction_length_model):
+
+    # Interaction lengths of a model on the Gmm grid of another one. Rates 1/lambda are interpolated
+    # linearly in ln(Gmm), so lambda = inf (a zero rate) needs no special case.
+    if Gmm.shape == Gmm_model.shape and np.array_equal(Gmm, Gmm_model):
+        return interaction_length_model
+
+    with np.errstate(divide = 'ignore'):
+        return 1. / _interp_rows(np.log(Gmm), np.log(Gmm_model), 1. / interaction_length_model)
+
+# ----------------------------------------------------------------------------------------------------
+def compare_models(nuclei, model = 'v2r4', reference = 'TENDL-2023', field = 'CMB', threshold = adiabatic_length):
+
+    # Differences of model with respect to reference for all nuclei at once, on the Gmm grid of model.
+    # The crossing point is the first Gmm where |lambda_reference| < threshold (default: adiabatic losses),
+    # and the summary statistics only cover Gmm beyond it; nuclei that never cross get index -1 and NaN.
+    nuclei = np.atleast_2d(nuclei)
+    Gmm, E, interaction_length = load_curves(nuclei, model, field)
+    Gmm_reference, _, interaction_length_reference = load_curves(nuclei, reference, field)
+    interaction_length_reference = align(Gmm, Gmm_reference, interaction_length_reference)
+
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        absolute_difference = np.abs(interaction_length - interaction_length_reference)
+        relative_difference = absolute_difference / interaction_length_reference
+
+    below = np.abs(interaction_length_reference) < threshold
+    crossed = below.any(axis = 1)
+    crossing_index = np.where(crossed, below.argmax(axis = 1), -1)
+
+    beyond = (np.arange(Gmm.shape[1])[None, :] >= crossing_index[:, None]) & crossed[:, None]
+    values = np.where(beyond & np.isfinite(relative_difference), relative_difference, np.nan)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning) # nuclei with no point beyond the crossing
+        max_relative_difference = np.nanmax(values, axis = 1)
+        rms_relative_difference = np.sqrt(np.nanmean(values**2, axis = 1))
+
+    return {'Gmm': Gmm, 'E': E,
+            'interaction_length': interaction_length, 'interaction_length_reference': interaction_length_reference,
+            'absolute_difference': absolute_difference, 'relative_difference': relative_difference,
+            'crossing_index': crossing_index, 'Gmm_crossing': np.where(crossed, Gmm[np.arange(len(Gmm)), crossing_index], np.nan),
+            'max_relative_difference': max_relative_difference, 'rms_relative_difference': rms_relative_difference}
+
+# ----------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    # Usage: python3 model_comparison.py A1 Z1 [A2 Z2 ...]
+    nuclei = np.array(sys.argv[1:], dtype = int).reshape(-1, 2)
+    comparison = compare_models(nuclei)
+
+    for inucleus, (A, Z) in enumerate(nuclei):
+        print(f"A = {A:3d}, Z = {Z:3d}  crossing Gmm = {comparison['Gmm_crossing'][inucleus]:.3e}  "
+              f"max = {100 * comparison['max_relative_difference'][inucleus]:.2f} %  rms = {100 * comparison['rms_relative_difference'][inucleus]:.2f} %")
+
+# ----------------------------------------------------------------------------------------------------
@@ -0,0 +1,90 @@
+import numpy as np
+
+from get_interaction_length import c, hbar, kB, T0
+
+# The photodisintegration rate only needs the photon field through the cumulative kernel
+#   K(x) = int_x^inf n(eps) / eps^2 deps    [1/(eV^2 m^3)],  n(eps) in 1/(eV m^3),
+# evaluated at x = eps'/(2 Gmm), so that I(eps', Gmm) = K(eps'/(2 Gmm)). K is linear in n, hence the
+# kernel of several fields (e.g. CMB + EBL) is the sum of their kernels and costs one lookup each.
+# Fields are registered by name as kernel functions: the CMB has a closed form, any other field
+# (analytic density or table) is integrated once onto a fine logarithmic grid and then interpolated.
+
+fields = {}
+
+points_per_decade = 200
+
+# ----------------------------------------------------------------------------------------------------
+def kernel_blackbody(x, T = T0):
+
+    return -(kB * T) / (np.pi**2 * (hbar * c)**3) * np.log1p(-np.exp(-x / (kB * T)))
+
+# ----------------------------------------------------------------------------------------------------
+def density_blackbody(eps, T = T0):
+
+    return eps**2 / (np.pi**2 * (hbar * c)**3) / np.expm1(eps / (kB * T)) # 1/(eV m^3)
+
+# ----------------------------------------------------------------------------------------------------
+def tabulate_kernel(density, eps_min, eps_max):
+
+    # Cumulative kernel of density on a logarithmic grid: returns (ln x, K(x)), integrating n/eps in ln(eps)
+    lneps = np.linspace(np.log(eps_min), np.log(eps_max), num = int(np.ceil(points_per_decade * np.log10(eps_max / eps_min))) + 1)
+    integrand = density(np.exp(lneps)) / np.exp(lneps)
+
+    segments = 0.5 * (integrand[1:] + integrand[:-1]) * np.diff(lneps)
+    K = np.append(np.cumsum(segments[::-1])[::-1], 0.)
+
+    return lneps, K
+
+# ----------------------------------------------------------------------------------------------------
+def kernel_from_table(lnx, K):
+
+    # Below the tabulated range every photon of the field is above threshold, above it none is
+    def kernel(x):
+        return np.interp(np.log(x), lnx, K, left = K[0], right = 0.)
+
+    return kernel
+
+# ----------------------------------------------------------------------------------------------------
+def register_field(name, kernel):
+
+    fields[name] = kernel
+
+# ----------------------------------------------------------------------------------------------------
+def register_density(name, density, eps_min, eps_max):
+
+    # Analytic field n(eps) [1/(eV m^3)] with photons between eps_min and eps_max [eV]
+    register_field(name, kernel_from_table(*tabulate_kernel(density, eps_min, eps_max)))
+
+# ----------------------------------------------------------------------------------------------------
+def load_field(name, filename, eps_unit = 1., density_unit = 1.):
+
+    # Tabulated field (e.g. an EBL model): columns eps and dn/deps, converted to eV and 1/(eV m^3) by the units
+    eps, density = np.loadtxt(filename, usecols = (0, 1), unpack = True)
+    eps = eps * eps_unit
+    density = density * density_unit
+
+    mask = density > 0
+    lneps_table = np.log(eps[mask])
+    lndensity_table = np.log(density[mask])
+
+    def density_interpolated(eps):
+        return np.exp(np.interp(np.log(eps), lneps_table, lndensity_table))
+
+    register_density(name, density_interpolated, eps[mask].min(), eps[mask].max())
+
+# ----------------------------------------------------------------------------------------------------
+def kernel(x, field_names = ('CMB',)):
+
+    x = np.asarray(x, dtype = float)
+
+    return sum(fields[name](x) for name in field_names)
+
+# ----------------------------------------------------------------------------------------------------
+def I(eps, Gmm, field_names = ('CMB',)):
+
+    return kernel(eps / (2 * Gmm), field_names)
+
+# ----------------------------------------------------------------------------------------------------
+register_field('CMB', kernel_blackbody)
+
+# ----------------------------------------------------------------------------------------------------
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+
+from cross_sections import get_cross_section, xs_models
+import get_interaction_length
+import interaction_lengths
+from results_store import TEXT_DIR, text_filename
+from run_interaction_length_jobs import run_jobs
+from v2r4_table import lookup
+import write_interaction_length_difference_file
+import write_interaction_length_file
+
+# Incremental rebuild of the interaction-length products. Every product is fingerprinted from its inputs:
+#   interactionLength_A..Z.._<model>.dat   cross-section inputs of that nucleus (its v2r4 row or its TENDL-2023
+#                                          table), photon-field constants, Gmm and eps grids, source code
+#   interactionLengthDifference*_A..Z..    fingerprints of the two interaction lengths it compares, source code
+# and only products whose fingerprint differs from the one recorded at their last build (or whose file is
+# missing) are rebuilt. Interaction lengths are rebuilt in parallel with run_interaction_length_jobs.py.
+# A product whose inputs are unavailable (a TENDL-2023 table that cannot be fetched, e.g. offline without a
+# cached copy, or an empty table) is skipped: its file and its recorded fingerprint are left as they are.
+# Usage: python3 pipeline.py [-n] [number of workers]     (-n only lists what would be rebuilt)
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_FILE = os.path.join(TEXT_DIR, '.pipeline.json')
+
+interaction_length_sources = ['cross_sections.py', 'get_cross_section_v2r4.py', 'get_cross_section_TENDL-2023.py', 'get_interaction_length.py',
+                              'photon_fields.py', 'interaction_lengths.py', 'resampling.py', 'results_store.py', 'tendl_cache.py',
+                              'v2r4_table.py', 'write_interaction_length_file.py']
+difference_sources = ['results_store.py', 'model_comparison.py', 'write_interaction_length_difference_file.py']
+
+# ----------------------------------------------------------------------------------------------------
+def fingerprint(*items):
+
+    h = hashlib.sha256()
+
+    for item in items:
+        if isinstance(item, np.ndarray):
+            h.update(np.ascontiguousarray(item).tobytes())
+        else:
+            h.update(json.dumps(item, sort_keys = True, default = str).encode())
+        h.update(b'\0')
+
+    return h.hexdigest()
+
+# ----------------------------------------------------------------------------------------------------
+def source_fingerprint(filenames):
+
+    h = hashlib.sha256()
+
+    for filename in filenames:
+        with open(os.path.join(SCRIPTS_DIR, filename), 'rb') as f:
+            h.update(f.read())
+
+    return h.hexdigest()
+
+# ----------------------------------------------------------------------------------------------------
+def cross_section_fingerprint(A, Z, model):
+
+    # Only the inputs of this nucleus: one row of the v2r4 table, or the (cached) TENDL-2023 table.
+    # Raises if they are unavailable, so that the product is skipped rather than built from nothing.
+    if model == 'v2r4':
+        return fingerprint(np.asarray(lookup(A, Z)))
+
+    eps, cross_section = get_cross_section(A, Z, model)
+
+    if len(eps) == 0:
+        raise ValueError(f'empty {model} cross section for A = {A}, Z = {Z}')
+
+    return fingerprint(eps, cross_section)
+
+# ----------------------------------------------------------------------------------------------------
+def interaction_length_fingerprint(A, Z, model):
+
+    photon_field = [get_interaction_length.c, get_interaction_length.hbar, get_interaction_length.kB, get_interaction_length.T0]
+    eps = [interaction_lengths.eps_min, interaction_lengths.eps_max, interaction_lengths.num_eps]
+
+    return fingerprint(cross_section_fingerprint(A, Z, model), photon_field, eps, write_interaction_length_file.lorentz_factors(A),
+                       source_fingerprint(interaction_length_sources))
+
+# ----------------------------------------------------------------------------------------------------
+def difference_filenames(A, Z):
+
+    return [write_interaction_length_difference_file.difference_filename(A, Z),
+            write_interaction_length_difference_file.difference_percentage_filename(A, Z)]
+
+# ----------------------------------------------------------------------------------------------------
+def load_state(state_file = STATE_FILE):
+
+    try:
+        with open(state_file) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+# ----------------------------------------------------------------------------------------------------
+def save_state(state, state_file = STATE_FILE):
+
+    tmp_filename = state_file + '.tmp'
+    with open(tmp_filename, 'w') as f:
+        json.dump(state, f, indent = 1, sort_keys = True)
+    os.replace(tmp_filename, state_file)
+
+# ----------------------------------------------------------------------------------------------------
+def run(dry_run = False, max_workers = None, state_file = STATE_FILE):
+
+    state = load_state(state_file)
+    fingerprints = {}
+    stale = []
+
+    for A, Z in write_interaction_length_file.nuclei:
+        for model in xs_models:
+            key = f'interactionLength_A{A:03}Z{Z:03}_{model}'
+            try:
+                fingerprints[key] = interaction_length_fingerprint(A, Z, model)
+            except Exception as e:
+                print(f'{key}: skipped, inputs unavailable ({e})')
+                continue
+            if state.get(key) != fingerprints[key] or not os.path.exists(text_filename(A, Z, model)):
+                stale.append((int(A), int(Z), model))
+
+    print(f'{len(stale)} interaction-length products to rebuild')
+    failed = []
+
+    if stale and not dry_run:
+        failed = run_jobs(stale, max_workers)
+        for A, Z, model in stale:
+            if (A, Z, model) not in failed:
+                state[f'interactionLength_A{A:03}Z{Z:03}_{model}'] = fingerprints[f'interactionLength_A{A:03}Z{Z:03}_{model}']
+        save_state(state, state_file)
+
+    for A, Z in write_interaction_length_difference_file.nuclei:
+        key = f'interactionLengthDifferences_A{A:03}Z{Z:03}'
+        inputs = [fingerprints.get(f'interactionLength_A{A:03}Z{Z:03}_{model}') for model in xs_models]
+
+        if None in inputs or any((int(A), int(Z), model) in failed for model in xs_models):
+            print(f'{key}: skipped, interaction lengths unavailable')
+            continue
+
+        fingerprints[key] = fingerprint(inputs, source_fingerprint(difference_sources))
+        if state.get(key) == fingerprints[key] and all(os.path.exists(filename) for filename in difference_filenames(A, Z)):
+            continue
+
+        print(f'{key}: rebuilding')
+        if not dry_run:
+            write_interaction_length_difference_file.write_interaction_length_difference_file(A, Z)
+            write_interaction_length_difference_file.write_interaction_length_difference_percentage_file(A, Z)
+            state[key] = fingerprints[key]
+            save_state(state, state_file)
+
+    return failed
+
+# ----------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    arguments = sys.argv[1:]
+    dry_run = '-n' in arguments
+    arguments = [argument for argument in arguments if argument != '-n']
+    max_workers = int(arguments[0]) if arguments else None
+
+    failed = run(dry_run, max_workers)
+
+    sys.exit(1 if failed else 0)
+
+# ----------------------------------------------------------------------------------------------------
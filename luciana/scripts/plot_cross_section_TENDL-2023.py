@@ -1,9 +1,11 @@
-from matplotlib import pyplot as plt
 from matplotlib.offsetbox import AnchoredText
-import ast
 import matplotlib.cm as cm
 import numpy as np 
-import subprocess
+
+from cross_sections import get_cross_section
+from plotting import pyplot
+
+plt = pyplot()
 
 plt.rcParams.update({'legend.fontsize': 'large',
 'legend.title_fontsize': 'large',
@@ -15,38 +17,6 @@ plt.rcParams.update({'legend.fontsize': 'large',
 nuclei = np.array([[16, 8], [28, 14], [56, 26], [195, 78]])
 nucleiList = np.array([[14, 7], [28, 14], [56, 26]])
 
-# ----------------------------------------------------------------------------------------------------
-def execute_get_cross_section_TENDL2023(A, Z):
-
-    output = subprocess.run(
-        ['python3', 'get_cross_section_TENDL-2023.py', str(A), str(Z)],
-        capture_output = True,
-        text = True
-    )
-    
-    if output.returncode != 0:
-            raise RuntimeError(f'Error executing script: {output.stderr.strip()}')
-    
-    eps, cross_section = [ast.literal_eval(line) for line in output.stdout.strip().split('\n')]
-
-    return np.array(eps), np.array(cross_section)
-
-# ----------------------------------------------------------------------------------------------------
-def execute_get_cross_section_v2r4(A, Z, ipart):
-
-    output = subprocess.run(
-        ['python3', 'get_cross_section_v2r4.py', str(A), str(Z), ipart],
-        capture_output = True,
-        text = True
-    )
-    
-    if output.returncode != 0:
-            raise RuntimeError(f'Error executing script: {output.stderr.strip()}')
-    
-    eps, cross_section = [ast.literal_eval(line) for line in output.stdout.strip().split('\n')]
-
-    return np.array(eps), np.array(cross_section)
-
 # ----------------------------------------------------------------------------------------------------
 def select_color(A, Z):
 
@@ -103,16 +73,8 @@ def get_color(A, Z):
 # ----------------------------------------------------------------------------------------------------
 def plot_cross_section_v2r4_vs_TENDL2023(A, Z):
 
-    eps_TENDL2023, cross_section_TENDL2023 = execute_get_cross_section_TENDL2023(A, Z)
-    mask_TENDL2023 = cross_section_TENDL2023 > 0
-    eps_TENDL2023 = eps_TENDL2023[mask_TENDL2023]
-    cross_section_TENDL2023 = cross_section_TENDL2023[mask_TENDL2023]
-
-    eps_v2r4 = execute_get_cross_section_v2r4(A, Z, 'N')[0]
-    cross_section_v2r4 = execute_get_cross_section_v2r4(A, Z, 'N')[1] + execute_get_cross_section_v2r4(A, Z, 'alpha')[1]
-    mask_v2r4 = cross_section_v2r4 > 0
-    eps_v2r4 = eps_v2r4[mask_v2r4]
-    cross_section_v2r4 = cross_section_v2r4[mask_v2r4] 
+    eps_TENDL2023, cross_section_TENDL2023 = get_cross_section(A, Z, 'TENDL-2023')
+    eps_v2r4, cross_section_v2r4 = get_cross_section(A, Z, 'v2r4')
 
     color = select_color(A, Z)
 
@@ -142,10 +104,7 @@ def plot_cross_section_TENDL2023():
         A = nucleus[0]
         Z = nucleus[1]
          
-        eps_TENDL2023, cross_section_TENDL2023 = execute_get_cross_section_TENDL2023(A, Z)
-        mask_TENDL2023 = cross_section_TENDL2023 > 0
-        eps_TENDL2023 = eps_TENDL2023[mask_TENDL2023]
-        cross_section_TENDL2023 = cross_section_TENDL2023[mask_TENDL2023]
+        eps_TENDL2023, cross_section_TENDL2023 = get_cross_section(A, Z, 'TENDL-2023')
 
         plt.plot(eps_TENDL2023, cross_section_TENDL2023, color = get_color(A, Z), label = '{}'.format(get_legend(A, Z)))
     
@@ -177,10 +136,7 @@ def plot_all_cross_sections_TENDL2023():
         color_value = (A - A_min) / (A_max - A_min)
         color = cm.viridis(color_value)
         
-        eps, cross_section = execute_get_cross_section_TENDL2023(A, Z)        
-        mask = cross_section > 0
-        eps = eps[mask]
-        cross_section = cross_section[mask]
+        eps, cross_section = get_cross_section(A, Z, 'TENDL-2023')
 
         ax.plot(eps, cross_section, color = color)
 
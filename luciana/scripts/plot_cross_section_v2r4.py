@@ -1,9 +1,12 @@
-from matplotlib import pyplot as plt
 from matplotlib.offsetbox import AnchoredText
-import ast
 import matplotlib.cm as cm
 import numpy as np 
-import subprocess
+
+from cross_sections import get_cross_section_v2r4
+from plotting import pyplot
+from v2r4_table import load_table
+
+plt = pyplot()
 
 plt.rcParams.update({'legend.fontsize': 'large',
 'legend.title_fontsize': 'large',
@@ -14,22 +17,6 @@ plt.rcParams.update({'legend.fontsize': 'large',
 
 nucleiList = np.array([[14, 7], [28, 14], [56, 26]])
 
-# ----------------------------------------------------------------------------------------------------
-def execute_get_cross_section_v2r4(A, Z, ipart):
-
-    output = subprocess.run(
-        ['python3', 'get_cross_section_v2r4.py', str(A), str(Z), ipart],
-        capture_output = True,
-        text = True
-    )
-    
-    if output.returncode != 0:
-            raise RuntimeError(f'Error executing script: {output.stderr.strip()}')
-    
-    eps, cross_section = [ast.literal_eval(line) for line in output.stdout.strip().split('\n')]
-
-    return np.array(eps), np.array(cross_section)
-
 # ----------------------------------------------------------------------------------------------------
 def select_color(A, Z):
 
@@ -55,8 +42,8 @@ def select_anchored_text(A, Z):
 # ----------------------------------------------------------------------------------------------------
 def plot_cross_section_v2r4(A, Z):
 
-    eps_N, cross_section_N = execute_get_cross_section_v2r4(A, Z, 'N')
-    cross_section_alpha = execute_get_cross_section_v2r4(A, Z, 'alpha')[1]
+    eps_N, cross_section_N = get_cross_section_v2r4(A, Z, 'N')
+    cross_section_alpha = get_cross_section_v2r4(A, Z, 'alpha')[1]
 
     mask_common = (cross_section_N > 0) & (cross_section_alpha > 0)
     
@@ -87,21 +74,20 @@ def plot_cross_section_v2r4(A, Z):
 # ----------------------------------------------------------------------------------------------------
 def plot_all_cross_sections_v2r4():
 
-    params = np.loadtxt('../../tables/v2r4/xsect_Gauss2_TALYS-restored.txt', skiprows = 2)
-    params = params[:-3]
+    params = load_table()[0][:-3]
 
     plt.figure()
 
-    unique_A_values = np.unique(params[:, 0])
+    unique_A_values = np.unique(params['A'])
     colormap = cm.get_cmap('viridis', len(unique_A_values))
 
     for irow in range(len(params)):
     
-        A = int(params[irow, 0])
-        Z = int(params[irow, 1])
+        A = int(params['A'][irow])
+        Z = int(params['Z'][irow])
         
-        eps, cross_section_N = execute_get_cross_section_v2r4(A, Z, 'N')
-        cross_section_alpha = execute_get_cross_section_v2r4(A, Z, 'alpha')[1]
+        eps, cross_section_N = get_cross_section_v2r4(A, Z, 'N')
+        cross_section_alpha = get_cross_section_v2r4(A, Z, 'alpha')[1]
         cross_section = cross_section_N + cross_section_alpha
         mask = cross_section > 0
         eps = eps[mask]
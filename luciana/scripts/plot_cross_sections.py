@@ -1,8 +1,11 @@
-from matplotlib import pyplot as plt
 from matplotlib.offsetbox import AnchoredText
-import ast
 import numpy as np
-import subprocess
+
+from cross_sections import get_cross_section
+from exfor_catalog import measurements
+from plotting import pyplot
+
+plt = pyplot()
 
 plt.rcParams.update({'legend.fontsize': 'large',
 'legend.title_fontsize': 'large',
@@ -12,47 +15,12 @@ plt.rcParams.update({'legend.fontsize': 'large',
 'ytick.labelsize': 'x-large'})
 
 FIGURS_DIR = '../figures'
-EXFOR_DIR = '../../tables/EXFOR'
-
-Al27_FILES = ['g_Al27_abs_L0122.007.txt', 'g_Al27_abs_L0083.006.txt', 'g_Al27_abs_M0825.010.txt', 'g_Al27_abs_M0188.016.txt'] # 'g_Al27_abs_M0825.011.txt'
-O16_FILES = ['g_O16_abs_L0064.004.txt', 'g_O16_abs_L0083.004.txt', 'g_O16_abs_L0122.004.txt']
-
-Al27_LEGENDS = ['Wyckoff et al. 1965', 'Ahrens et al. 1972', 'Ahrens et al. 1975', 'Ahrens et al. 1985']
-O16_LEGENDS = ['Bezic et al. 1969', 'Ahrens et al. 1972', 'Wyckoff et al. 1975']
+COLORS = ['b', 'g', 'r', 'orange', 'm', 'c', 'y']
+E_RANGE = [0, 50] # MeV
 
-COLORS = ['b', 'g', 'r', 'orange']
-
-# ----------------------------------------------------------------------------------------------------
-def execute_get_cross_section_TENDL2023(A, Z):
-
-    output = subprocess.run(
-        ['python3', 'get_cross_section_TENDL-2023.py', str(A), str(Z)],
-        capture_output = True,
-        text = True
-    )
-    
-    if output.returncode != 0:
-            raise RuntimeError(f'Error executing script: {output.stderr.strip()}')
-    
-    eps, cross_section = [ast.literal_eval(line) for line in output.stdout.strip().split('\n')]
-
-    return np.array(eps), np.array(cross_section)
-
-# ----------------------------------------------------------------------------------------------------
-def execute_get_cross_section_v2r4(A, Z, ipart):
-
-    output = subprocess.run(
-        ['python3', 'get_cross_section_v2r4.py', str(A), str(Z), ipart],
-        capture_output = True,
-        text = True
-    )
-    
-    if output.returncode != 0:
-            raise RuntimeError(f'Error executing script: {output.stderr.strip()}')
-    
-    eps, cross_section = [ast.literal_eval(line) for line in output.stdout.strip().split('\n')]
-
-    return np.array(eps), np.array(cross_section)
+# EXFOR measurements left out of the figures: the second Ahrens et al. 1975 set (M0825.011), which covers
+# M0825.010 below 40 MeV on a coarser grid, and Ishkhanov et al. 2002 (M0648.015), which gives no uncertainties
+EXCLUDED = {(27, 13): ['M0825.011', 'M0648.015']}
 
 # ----------------------------------------------------------------------------------------------------
 def get_anchored_text(A, Z):
@@ -64,16 +32,6 @@ def get_anchored_text(A, Z):
     else:
         raise ValueError(f"Nucleus with A = {A} and Z = {Z} not found.") 
     
-# ----------------------------------------------------------------------------------------------------
-def get_files_and_legends(A, Z):
-
-    if A == 16 and Z == 8:
-        return O16_FILES, O16_LEGENDS
-    elif A == 27 and Z == 13:
-        return Al27_FILES, Al27_LEGENDS
-    else:
-        raise ValueError(f"Files not available for nucleus with A = {A} and Z = {Z}")
-
 # ----------------------------------------------------------------------------------------------------
 def get_nucleus_label(A, Z):
 
@@ -87,36 +45,23 @@ def get_nucleus_label(A, Z):
 # ----------------------------------------------------------------------------------------------------
 def plot_cross_section_measurements(A, Z):
 
-    files, legends = get_files_and_legends(A, Z)
-    
-    for i, filename in enumerate(files):
-        cross_section_data = np.loadtxt(f"{EXFOR_DIR}/{filename}")
-
-        x_values = cross_section_data[:, 0]  
-        y_values = cross_section_data[:, 1]  
-        y_errors = cross_section_data[:, 2] 
-
+    # The EXFOR measurements of the nucleus with points in the plotted range, labelled with their reference
+    for i, measurement in enumerate(measurements(A, Z, energy_range = E_RANGE, exclude = EXCLUDED.get((A, Z), ()))):
         color = COLORS[i % len(COLORS)]
-        label = legends[i % len(legends)]
 
-        plt.errorbar(x_values, y_values, yerr = y_errors, fmt = 'o', color = color, capsize = 2, elinewidth = 1, markersize = 2, label = label, zorder = -1)
+        plt.errorbar(measurement['E'], measurement['sigma'], yerr = np.nan_to_num(measurement['sigma_error']), fmt = 'o', color = color,
+                     capsize = 2, elinewidth = 1, markersize = 2, label = measurement['label'], zorder = -1)
 
 # ----------------------------------------------------------------------------------------------------
 def plot_cross_section_TENDL2023(A, Z):
 
-    eps, cross_section = execute_get_cross_section_TENDL2023(A, Z)
-    mask = cross_section > 0
-    eps = eps[mask]
-    cross_section = cross_section[mask]
+    eps, cross_section = get_cross_section(A, Z, 'TENDL-2023')
     plt.plot(eps, cross_section, color = 'k', ls = '-', label = r'TENDL-2023')
 
 # ----------------------------------------------------------------------------------------------------
 def plot_cross_section_v2r4(A, Z):
 
-    eps, cross_section = execute_get_cross_section_v2r4(A, Z, 'N')[0], execute_get_cross_section_v2r4(A, Z, 'N')[1] + execute_get_cross_section_v2r4(A, Z, 'alpha')[1]
-    mask = cross_section > 0
-    eps = eps[mask]
-    cross_section = cross_section[mask] 
+    eps, cross_section = get_cross_section(A, Z, 'v2r4')
     plt.plot(eps, cross_section, color = 'k', ls = '--', label = r'SimProp v2r4')
 
 # ----------------------------------------------------------------------------------------------------
@@ -129,7 +74,7 @@ def plot_cross_sections(A, Z):
     at = AnchoredText('{0}'.format(get_anchored_text(A, Z)), loc = 'upper left', frameon = False, prop = {'fontsize': 'x-large'})
     plt.gca().add_artist(at)   
 
-    plt.xlim([0, 50])
+    plt.xlim(E_RANGE)
     plt.ylim(bottom = 0)
     plt.xlabel(r'Photon energy$\: \rm [MeV]$')
     plt.ylabel(r'Inelastic cross section$\: \rm [mb]$')
@@ -1,8 +1,13 @@
 from matplotlib import lines
-from matplotlib import pyplot as plt
-from matplotlib.pylab import cm
+from matplotlib import cm
 import numpy as np 
 
+from model_comparison import compare_models
+from plotting import pyplot
+from results_store import read_energy_interaction_length
+
+plt = pyplot()
+
 plt.rcParams.update({'legend.fontsize': 'large',
 'legend.title_fontsize': 'large',
 'axes.labelsize': 'x-large',
@@ -80,9 +85,7 @@ def plot_energy_loss_length():
         for nucleus in nuclei:
 
             A, Z = nucleus
-            data = np.loadtxt('../results/interaction-length/interactionLength_A{0:03}Z{1:03}_{2}.dat'.format(A, Z, xs_model))
-            E = data[:,0]
-            interaction_length = data[:,1]
+            E, interaction_length = read_energy_interaction_length(A, Z, xs_model)
 
             if xs_model == 'v2r4':
                 plt.plot(np.log10(E), interaction_length, color = get_color(A, Z), ls = '--')
@@ -94,9 +97,7 @@ def plot_energy_loss_length():
                     interaction_length = interaction_length[mask]
                 plt.plot(np.log10(E), interaction_length, color = get_color(A, Z), ls = '-', label = '{}'.format(get_legend(A, Z)))               
 
-    data = np.loadtxt('../results/interaction-length/interactionLength_A{0:03}Z{1:03}_{2}.dat'.format(nucleus_Pt[0], nucleus_Pt[1], xs_models[1]))
-    E = data[:,0]
-    interaction_length = data[:,1]
+    E, interaction_length = read_energy_interaction_length(nucleus_Pt[0], nucleus_Pt[1], xs_models[1])
     plt.plot(np.log10(E), interaction_length, color = get_color(nucleus_Pt[0], nucleus_Pt[1]), ls = '-', label = '{}'.format(get_legend(nucleus_Pt[0], nucleus_Pt[1])))
     print()
 
@@ -124,9 +125,7 @@ def plot_energy_loss_length_inverted_colors():
         for nucleus in nuclei:
 
             A, Z = nucleus
-            data = np.loadtxt('../results/interaction-length/interactionLength_A{0:03}Z{1:03}_{2}.dat'.format(A, Z, xs_model))
-            E = data[:,0]
-            interaction_length = data[:,1]
+            E, interaction_length = read_energy_interaction_length(A, Z, xs_model)
 
             if xs_model == 'v2r4':
                 plt.plot(np.log10(E), interaction_length, color = get_color_inverted_colors(A, Z), ls = '--')
@@ -138,9 +137,7 @@ def plot_energy_loss_length_inverted_colors():
                     interaction_length = interaction_length[mask]
                 plt.plot(np.log10(E), interaction_length, color = get_color_inverted_colors(A, Z), ls = '-', label = '{}'.format(get_legend(A, Z)))               
 
-    data = np.loadtxt('../results/interaction-length/interactionLength_A{0:03}Z{1:03}_{2}.dat'.format(nucleus_Pt[0], nucleus_Pt[1], xs_models[1]))
-    E = data[:,0]
-    interaction_length = data[:,1]
+    E, interaction_length = read_energy_interaction_length(nucleus_Pt[0], nucleus_Pt[1], xs_models[1])
     plt.plot(np.log10(E), interaction_length, color = get_color_inverted_colors(nucleus_Pt[0], nucleus_Pt[1]), ls = '-', label = '{}'.format(get_legend(nucleus_Pt[0], nucleus_Pt[1])))
     print()
 
@@ -185,9 +182,7 @@ def plot_energy_loss_length_TENDL2023():
     for nucleus in nuclei:
 
         A, Z = nucleus
-        data = np.loadtxt('../results/interaction-length/interactionLength_A{0:03}Z{1:03}_{2}.dat'.format(A, Z, 'TENDL-2023'))
-        E = data[:,0]
-        interaction_length = data[:,1]
+        E, interaction_length = read_energy_interaction_length(A, Z, 'TENDL-2023')
 
         if A == 28 and Z == 14:
             mask = interaction_length >= 0 
@@ -196,9 +191,7 @@ def plot_energy_loss_length_TENDL2023():
         
         plt.plot(np.log10(E), interaction_length, color = get_color(A, Z), ls = '-', label = '{}'.format(get_legend(A, Z)))               
 
-    data = np.loadtxt('../results/interaction-length/interactionLength_A{0:03}Z{1:03}_{2}.dat'.format(nucleus_Pt[0], nucleus_Pt[1], xs_models[1]))
-    E = data[:,0]
-    interaction_length = data[:,1]
+    E, interaction_length = read_energy_interaction_length(nucleus_Pt[0], nucleus_Pt[1], xs_models[1])
     plt.plot(np.log10(E), interaction_length, color = get_color(nucleus_Pt[0], nucleus_Pt[1]), ls = '-', label = '{}'.format(get_legend(nucleus_Pt[0], nucleus_Pt[1])))
     print()
 
@@ -217,17 +210,15 @@ def plot_energy_loss_length_relative_difference():
 
     plt.figure()
 
-    for nucleus in nuclei:
+    # Only energies past the crossing of the TENDL-2023 length with the adiabatic one
+    comparison = compare_models(nuclei, threshold = c/H0/Mpc)
 
-        A, Z = nucleus
-        data = np.loadtxt(f"../results/interaction-length/interactionLengthDifferencePercentages_A{A:03}Z{Z:03}.dat")
-        data_TENDL2023 = np.loadtxt(f"../results/interaction-length/interactionLength_A{A:03}Z{Z:03}_TENDL-2023.dat")
+    for inucleus, nucleus in enumerate(nuclei):
 
-        for iE in range(len(data_TENDL2023)):
-            if abs(data_TENDL2023[iE,1]) < c/H0/Mpc:
-                break
+        A, Z = nucleus
+        iE = comparison['crossing_index'][inucleus]
 
-        plt.plot(np.log10(data[:,0][iE:]), data[:,1][iE:], color = get_color(A, Z), label = '{}'.format(get_legend(A, Z)))
+        plt.plot(np.log10(comparison['E'][inucleus][iE:]), 1.e2 * comparison['relative_difference'][inucleus][iE:], color = get_color(A, Z), label = '{}'.format(get_legend(A, Z)))
 
     plt.yscale('log')
     plt.ylim([1.e-1, 1.e2])
@@ -1,13 +1,57 @@
-import numpy as np 
+from matplotlib import cm
+import numpy as np
+
+from cascade import cascade_mean_lnA
+from plotting import pyplot
+from propagation import build_channel_tables, mean_lnA
+
+plt = pyplot()
+
+plt.rcParams.update({'legend.fontsize': 'large',
+'legend.title_fontsize': 'large',
+'axes.labelsize': 'x-large',
+'axes.titlesize': 'xx-large',
+'xtick.labelsize': 'x-large',
+'ytick.labelsize': 'x-large'})
+
+nucleus = [56, 26]
+log10_energies = [19.5, 20., 20.5, 21.] # injection energies, log10(E/eV)
+method = 'cascade' # or 'monte-carlo'
+num_particles = 10**6 # Monte Carlo only
+seed = 1
+
+distances = np.logspace(0, 3.5, num = 71) # Mpc
 
 # ----------------------------------------------------------------------------------------------------
 def plot_mean_lnA():
 
-    return
+    A, Z = nucleus
+    tables = build_channel_tables([nucleus], 'v2r4')
+    colors = cm.plasma(np.linspace(0, 1, len(log10_energies) + 2))[1:-1]
+
+    plt.figure()
+
+    for log10_energy, color in zip(log10_energies, colors):
+        if method == 'cascade':
+            mean, spread = cascade_mean_lnA(A, Z, 10**log10_energy, distances, 'v2r4', tables)
+        else:
+            mean, spread = mean_lnA(A, Z, np.full(num_particles, 10**log10_energy), distances, 'v2r4', seed, tables = tables)
+        plt.plot(distances, mean, color = color, label = r'$10^{{{}}}$ eV'.format(log10_energy))
+        plt.fill_between(distances, mean - spread, mean + spread, color = color, alpha = 0.2, lw = 0)
+
+    plt.axhline(np.log(A), color = 'gray', ls = ':')
+    plt.xscale('log')
+    plt.ylim([0, 4.2])
+    plt.xlabel(r'Distance$\: \rm [Mpc]$')
+    plt.ylabel(r'$\langle \ln A \rangle$')
+    plt.legend(title = r'$^{56}$Fe injected at', loc = 'lower left')
+    plt.savefig('../figures/mean_lnA.pdf', bbox_inches = 'tight')
+    plt.savefig('../figures/mean_lnA.png', bbox_inches = 'tight', dpi = 300)
+    plt.show()
 
 # ----------------------------------------------------------------------------------------------------
 if __name__ == '__main__':
 
     plot_mean_lnA()
 
-# ----------------------------------------------------------------------------------------------------
\ No newline at end of file
+# ----------------------------------------------------------------------------------------------------
@@ -0,0 +1,44 @@
+import os
+import sys
+
+# Plotting is kept out of the numerical modules: nothing imports matplotlib until pyplot() is called, so
+# workers of run_interaction_length_jobs.py, pipeline.py or propagation.py start without it.
+# The backend is taken from LUCIANA_PLOT_BACKEND (or matplotlib's own MPLBACKEND); otherwise MacOSX is used
+# on macOS, Agg on machines without a display and matplotlib's default elsewhere.
+
+_pyplot = None
+
+# ----------------------------------------------------------------------------------------------------
+def backend():
+
+    name = os.environ.get('LUCIANA_PLOT_BACKEND') or os.environ.get('MPLBACKEND')
+
+    if name:
+        return name
+    if sys.platform == 'darwin':
+        return 'MacOSX'
+    if not (os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY')):
+        return 'Agg'
+
+    return None
+
+# ----------------------------------------------------------------------------------------------------
+def pyplot(style = None):
+
+    # matplotlib.pyplot with the backend selected once, then the given style sheet applied
+    global _pyplot
+
+    if _pyplot is None:
+        import matplotlib
+        name = backend()
+        if name:
+            matplotlib.use(name)
+        from matplotlib import pyplot as plt
+        _pyplot = plt
+
+    if style:
+        _pyplot.style.use(style)
+
+    return _pyplot
+
+# ----------------------------------------------------------------------------------------------------
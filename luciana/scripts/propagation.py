@@ -0,0 +1,232 @@
+from concurrent.futures import ProcessPoolExecutor
+import importlib
+import os
+
+import numpy as np
+
+from channel_observables import count_nucleons
+from get_cross_section_v2r4 import cross_section_Model4
+from get_interaction_length import c, Mpc
+from interaction_lengths import energy_grid, kernel_matrix
+from model_comparison import adiabatic_length
+from resampling import resample
+from tendl_channels import load_bundle
+from v2r4_table import load_table
+
+get_cross_section_TENDL = importlib.import_module('get_cross_section_TENDL-2023')
+
+# Batched Monte Carlo propagation of nuclei through the photon field, photodisintegration plus adiabatic losses
+# (E -> E exp(-x H0/c), no redshift evolution of the field, no pair production or pion production).
+# Every nucleus that can appear in a cascade gets a row of channel tables on a uniform ln(Gmm) grid:
+#   products  (row, channel)        row of the fragment left by each channel, -1 for padding
+#   rates     (row, channel, Gmm)   channel interaction rates [1/s]
+# v2r4: the N and alpha channels, the fragment being the tabulated isotope of mass A-1 or A-4.
+# TENDL-2023: every exclusive channel of the packed bundles (tendl_channels.py); fragments without a bundle
+# are kept as stable. Emitted nucleons and light fragments are not followed.
+# Particles are advanced together as arrays: each step is the distance to the next interaction, drawn from
+# the total rate, capped at the next output distance and at max_step, so lnA is recorded at every output.
+
+mp = 1.e9 # 1 GeV
+
+Gmm_min = 1.e6
+Gmm_max = 1.e13
+points_per_decade = 50
+
+max_step = adiabatic_length / 100. # Mpc, rates are evaluated at the Gmm of the start of each step
+chunk_size = 65536                 # interacting particles per fragment-sampling batch
+
+# ----------------------------------------------------------------------------------------------------
+def Gmm_grid():
+
+    num = int(round(points_per_decade * np.log10(Gmm_max / Gmm_min))) + 1
+
+    return np.linspace(np.log(Gmm_min), np.log(Gmm_max), num = num)
+
+# ----------------------------------------------------------------------------------------------------
+def _v2r4_channels(eps):
+
+    # (fragment (A, Z), sigma [mb] on eps) of the N and alpha channels of every tabulated nucleus
+    table = load_table()[0]
+    Z_of_A = dict(zip(table['A'].tolist(), table['Z'].tolist()))
+    masses = np.array(sorted(Z_of_A))
+
+    def fragment(A):
+        # Unbound masses (5, 8) fall to the next tabulated one, A = 1 is a proton
+        if A <= 1:
+            return (1, 1)
+        A = int(masses[masses <= A].max())
+        return (A, Z_of_A[A])
+
+    return {(A, Z): [(fragment(A - 1), cross_section_Model4(A, Z, 'N', eps)[1]), (fragment(A - 4), cross_section_Model4(A, Z, 'alpha', eps)[1])]
+            for A, Z in zip(table['A'].tolist(), table['Z'].tolist())}
+
+# ----------------------------------------------------------------------------------------------------
+def _tendl_channels(A, Z, eps):
+
+    # (fragment (A, Z), sigma [mb] on eps) of every exclusive channel, [] if the nucleus has no bundle
+    try:
+        E, codes, sigma = load_bundle(f'{get_cross_section_TENDL.elements[Z]}{A}')
+    except (FileNotFoundError, KeyError):
+        return []
+
+    codes = np.asarray(codes, dtype = int)
+    i_n, i_p, i_d, i_t, i_h, i_a = codes.T
+    A_fragment = A - count_nucleons(i_n, i_p, i_d, i_t, i_h, i_a)
+    Z_fragment = Z - (i_p + i_d + i_t + 2 * (i_h + i_a))
+
+    return [((int(A_k), int(Z_k)), sigma_k)
+            for A_k, Z_k, sigma_k in zip(A_fragment, Z_fragment, resample(E, sigma, eps)) if A_k >= 1 and Z_k >= 0]
+
+# ----------------------------------------------------------------------------------------------------
+def build_channel_tables(nuclei, model = 'v2r4'):
+
+    # Channel tables of the given nuclei and of every fragment reachable from them
+    eps = energy_grid()
+    lnGmm = Gmm_grid()
+    kernel = kernel_matrix(eps, np.exp(lnGmm)) # sigma [mb] @ kernel = rate [1/s]
+
+    v2r4 = _v2r4_channels(eps) if model == 'v2r4' else None
+
+    pending = [tuple(int(i) for i in nucleus) for nucleus in np.atleast_2d(nuclei)]
+    channels = {}
+    while pending:
+        nucleus = pending.pop()
+        if nucleus in channels:
+            continue
+        if model == 'v2r4':
+            channels[nucleus] = v2r4.get(nucleus, [])
+        elif model == 'TENDL-2023':
+            channels[nucleus] = _tendl_channels(*nucleus, eps)
+        else:
+            raise ValueError(f"Unknown cross-section model '{model}'. Please use 'v2r4' or 'TENDL-2023'.")
+        pending += [fragment for fragment, _ in channels[nucleus] if fragment not in channels]
+
+    stable = [nucleus for nucleus, nucleus_channels in channels.items() if not nucleus_channels and nucleus[0] > 4]
+    if stable:
+        print(f'No {model} cross sections for {len(stable)} nuclei, treated as stable: {sorted(stable)}')
+
+    nuclei = sorted(channels)
+    row = {nucleus: irow for irow, nucleus in enumerate(nuclei)}
+    num_channels = max(1, max(len(nucleus_channels) for nucleus_channels in channels.values()))
+
+    products = np.full((len(nuclei), num_channels), -1, dtype = np.int64)
+    rates = np.zeros((len(nuclei), num_channels, len(lnGmm)))
+    for nucleus, nucleus_channels in channels.items():
+        for ichannel, (fragment, sigma) in enumerate(nucleus_channels):
+            products[row[nucleus], ichannel] = row[fragment]
+            rates[row[nucleus], ichannel] = np.clip(sigma @ kernel, 0., None)
+
+    A, Z = np.array(nuclei, dtype = np.int64).T
+
+    return {'A': A, 'Z': Z, 'lnGmm': lnGmm, 'products': products, 'rates': rates, 'total_rates': rates.sum(axis = 1)}
+
+# ----------------------------------------------------------------------------------------------------
+def _grid_position(tables, lnGmm):
+
+    # Cell index and weight of ln(Gmm) on the uniform grid, clamped to its ends
+    grid = tables['lnGmm']
+    x = np.clip((lnGmm - grid[0]) / (grid[1] - grid[0]), 0., len(grid) - 1.)
+    i = np.minimum(x.astype(np.int64), len(grid) - 2)
+
+    return i, x - i
+
+# ----------------------------------------------------------------------------------------------------
+def _sample_fragments(tables, rows, lnGmm, rng):
+
+    # Fragment row of every interacting particle, drawn from the channel rates at lnGmm; a particle with no
+    # channel open there keeps its row
+    fragments = np.empty_like(rows)
+
+    for start in range(0, len(rows), chunk_size):
+        rows_chunk = rows[start:start + chunk_size]
+        i, t = _grid_position(tables, lnGmm[start:start + chunk_size])
+        rates = (1. - t)[:, None] * tables['rates'][rows_chunk, :, i] + t[:, None] * tables['rates'][rows_chunk, :, i + 1]
+
+        cumulative = np.cumsum(rates, axis = 1)
+        target = rng.random(len(rows_chunk)) * cumulative[:, -1]
+        channel = np.minimum((cumulative < target[:, None]).sum(axis = 1), rates.shape[1] - 1)
+
+        fragments[start:start + chunk_size] = np.where(cumulative[:, -1] > 0, tables['products'][rows_chunk, channel], rows_chunk)
+
+    return fragments
+
+# ----------------------------------------------------------------------------------------------------
+def propagate(A, Z, E, distances, tables, seed = None):
+
+    # Propagate nuclei given as arrays (A, Z, E [eV]) and return the sums of lnA and lnA^2 over particles
+    # at every distance [Mpc]
+    rng = np.random.default_rng(seed)
+    distances = np.asarray(distances, dtype = float)
+
+    index = np.full((tables['A'].max() + 1, tables['Z'].max() + 1), -1, dtype = np.int64)
+    index[tables['A'], tables['Z']] = np.arange(len(tables['A']))
+    rows = index[np.asarray(A, dtype = np.int64), np.asarray(Z, dtype = np.int64)]
+
+    if np.any(rows < 0):
+        raise ValueError('Some of the nuclei to propagate are missing from the channel tables')
+
+    lnGmm = np.log(np.asarray(E, dtype = float) / (tables['A'][rows] * mp))
+
+    x = np.zeros(len(rows))
+    ioutput = np.zeros(len(rows), dtype = np.int64)
+    lnA = np.log(tables['A']).astype(float)
+    sum_lnA = np.zeros(len(distances))
+    sum_lnA2 = np.zeros(len(distances))
+
+    active = np.arange(len(rows))
+    while active.size:
+        lnGmm_start = lnGmm[active]
+        i, t = _grid_position(tables, lnGmm_start)
+        rate = (1. - t) * tables['total_rates'][rows[active], i] + t * tables['total_rates'][rows[active], i + 1]
+
+        with np.errstate(divide = 'ignore'):
+            step_interaction = -np.log1p(-rng.random(active.size)) * c / rate / Mpc
+        step_output = distances[ioutput[active]] - x[active]
+        step = np.minimum(step_interaction, np.minimum(step_output, max_step))
+
+        x[active] += step
+        lnGmm[active] -= step / adiabatic_length
+
+        # The channel is drawn at the Gmm the interaction was drawn at, where the total rate is > 0
+        interacting = step_interaction < np.minimum(step_output, max_step)
+        if interacting.any():
+            rows[active[interacting]] = _sample_fragments(tables, rows[active[interacting]], lnGmm_start[interacting], rng)
+
+        arrived = active[~interacting & (step_output <= max_step)]
+        x[arrived] = distances[ioutput[arrived]]
+        sum_lnA += np.bincount(ioutput[arrived], weights = lnA[rows[arrived]], minlength = len(distances))
+        sum_lnA2 += np.bincount(ioutput[arrived], weights = lnA[rows[arrived]]**2, minlength = len(distances))
+        ioutput[arrived] += 1
+
+        active = active[ioutput[active] < len(distances)]
+
+    return sum_lnA, sum_lnA2
+
+# ----------------------------------------------------------------------------------------------------
+def mean_lnA(A, Z, E, distances, model = 'v2r4', seed = None, max_workers = None, tables = None):
+
+    # <lnA> and its spread vs distance [Mpc], the particles being split over max_workers processes.
+    # Each process gets its own stream spawned from seed, so results only depend on seed and max_workers.
+    E = np.atleast_1d(np.asarray(E, dtype = float))
+    A = np.broadcast_to(A, E.shape)
+    Z = np.broadcast_to(Z, E.shape)
+    tables = tables or build_channel_tables(np.unique(np.column_stack([A, Z]), axis = 0), model)
+    max_workers = max_workers or os.cpu_count()
+
+    parts = np.array_split(np.arange(len(E)), max_workers)
+    seeds = np.random.SeedSequence(seed).spawn(len(parts))
+
+    if max_workers == 1:
+        results = [propagate(A, Z, E, distances, tables, seeds[0])]
+    else:
+        with ProcessPoolExecutor(max_workers = max_workers) as executor:
+            futures = [executor.submit(propagate, A[part], Z[part], E[part], distances, tables, seed_part) for part, seed_part in zip(parts, seeds)]
+            results = [future.result() for future in futures]
+
+    sum_lnA = sum(result[0] for result in results)
+    sum_lnA2 = sum(result[1] for result in results)
+    mean = sum_lnA / len(E)
+
+    return mean, np.sqrt(np.clip(sum_lnA2 / len(E) - mean**2, 0., None))
+
+# ----------------------------------------------------------------------------------------------------
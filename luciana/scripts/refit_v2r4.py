@@ -0,0 +1,202 @@
+import importlib
+import os
+import sys
+
+import numpy as np
+
+from channel_observables import chart_observables
+from get_cross_section_v2r4 import eps_1, eps_max
+from tendl_channels import TENDL_DIR, bundle_path
+from v2r4_table import V2R4_FILE, fields_N, fields_alpha, load_table
+
+get_cross_section_TENDL = importlib.import_module('get_cross_section_TENDL-2023')
+
+# Refit of the v2r4 parametrization (cross_section_Model4) to the TENDL-2023 exclusive channels, for every
+# nucleus at once. For each nucleus and for the N and alpha sums of its channels (channel_observables.py):
+#   t            last energy with a vanishing cross section below the first non-zero one
+#   c            mean cross section between eps_1 and eps_max (linear least squares for a constant)
+#   h1, x1, w1   h1 exp(-(eps - x1)^2 / w1) fitted on t < eps < eps_1 by Levenberg-Marquardt, all nuclei and
+#                channels being one batch of 3-parameter problems with analytic Jacobians
+# Nuclei without a TENDL-2023 bundle keep their current parameters. The new table has the layout of the
+# v2r4 table (and can be read with v2r4_table.load_table(text_file = ...)); goodness-of-fit diagnostics are
+# written next to it.
+# Usage: python3 refit_v2r4.py [output table]
+
+REFIT_FILE = os.path.join(os.path.dirname(V2R4_FILE), 'xsect_Gauss2_TENDL-2023-refit.txt')
+
+fit_grid = np.linspace(1., eps_max, num = 597) # MeV, 0.25 MeV steps
+max_iterations = 200
+rtol = 1.e-10
+
+# ----------------------------------------------------------------------------------------------------
+def gaussian_jacobian(E, params):
+
+    # Model h1 exp(-(E - x1)^2 / w1) (problem x energy) and its derivatives (problem x energy x parameter)
+    h1, x1, w1 = (params[:, i, None] for i in range(3))
+    g = np.exp(-(E - x1)**2 / w1)
+    model = h1 * g
+
+    return model, np.stack([g, model * 2. * (E - x1) / w1, model * (E - x1)**2 / w1**2], axis = -1)
+
+# ----------------------------------------------------------------------------------------------------
+def _cost(E, sigma, mask, params):
+
+    with np.errstate(over = 'ignore', invalid = 'ignore', divide = 'ignore'):
+        model = params[:, 0, None] * np.exp(-(E - params[:, 1, None])**2 / params[:, 2, None])
+
+    return np.where(mask, (model - sigma)**2, 0.).sum(axis = 1)
+
+# ----------------------------------------------------------------------------------------------------
+def initial_guess(E, sigma, mask):
+
+    # Height, mean and (twice the) variance of the masked cross sections
+    weights = np.where(mask, np.clip(sigma, 0., None), 0.)
+    norm = np.maximum(weights.sum(axis = 1), 1.e-300)
+    x1 = (weights * E).sum(axis = 1) / norm
+    w1 = 2. * (weights * (E - x1[:, None])**2).sum(axis = 1) / norm
+
+    return np.column_stack([weights.max(axis = 1), x1, np.maximum(w1, 1.)])
+
+# ----------------------------------------------------------------------------------------------------
+def fit_gaussians(E, sigma, mask, max_iterations = max_iterations, rtol = rtol):
+
+    # Batched Levenberg-Marquardt: returns parameters (problem x 3), cost, iterations and convergence flags
+    params = initial_guess(E, sigma, mask)
+    cost = _cost(E, sigma, mask, params)
+    damping = np.full(len(params), 1.e-3)
+    iterations = np.zeros(len(params), dtype = int)
+    converged = ~(mask.any(axis = 1) & (params[:, 0] > 0.))
+
+    for iteration in range(max_iterations):
+        active = ~converged
+        if not active.any():
+            break
+
+        model, jacobian = gaussian_jacobian(E, params[active])
+        residuals = np.where(mask[active], model - sigma[active], 0.)
+        jacobian = np.where(mask[active, :, None], jacobian, 0.)
+
+        JTJ = np.einsum('pei,pej->pij', jacobian, jacobian)
+        gradient = np.einsum('pei,pe->pi', jacobian, residuals)
+        diagonal = np.einsum('pii->pi', JTJ)
+        system = JTJ + (damping[active, None] * (diagonal + 1.e-12 * diagonal.max(axis = 1, keepdims = True)))[:, :, None] * np.eye(3)
+
+        trial = params[active] - np.linalg.solve(system, gradient[:, :, None])[:, :, 0]
+        trial_cost = _cost(E, sigma[active], mask[active], trial)
+
+        better = (trial[:, 2] > 0.) & np.isfinite(trial_cost) & (trial_cost < cost[active])
+        rows = np.flatnonzero(active)
+
+        iterations[rows] += 1
+        converged[rows[better]] = cost[rows[better]] - trial_cost[better] <= rtol * cost[rows[better]]
+        params[rows[better]] = trial[better]
+        cost[rows[better]] = trial_cost[better]
+        damping[rows] = np.where(better, damping[rows] / 3., damping[rows] * 2.)
+
+        # No downhill step even with a vanishing step size: at the minimum to machine precision
+        converged[rows[~better & (damping[rows] > 1.e12)]] = True
+
+    return params, cost, iterations, converged
+
+# ----------------------------------------------------------------------------------------------------
+def fit_channel(E, sigma):
+
+    # v2r4 parameters (problem x [t, h1, x1, w1, c]) of cross sections sigma (problem x energy) and the fit diagnostics
+    nonzero = sigma > 0.
+    first = np.where(nonzero.any(axis = 1), nonzero.argmax(axis = 1), len(E) - 1)
+    t = np.where(first > 0, E[np.maximum(first - 1, 0)], 0.)
+
+    plateau = (E > eps_1) & (E < eps_max)
+    c = sigma[:, plateau].mean(axis = 1)
+
+    resonance = (E[None, :] > t[:, None]) & (E[None, :] < eps_1)
+    gaussians, cost, iterations, converged = fit_gaussians(E, sigma, resonance)
+
+    params = np.column_stack([t, gaussians, c])
+    empty = ~nonzero.any(axis = 1)
+    params[empty] = [0., 0., 0., 1., 0.]
+
+    return params, diagnostics(E, sigma, params, iterations, converged)
+
+# ----------------------------------------------------------------------------------------------------
+def model_matrix(E, params):
+
+    # cross_section_Model4 for many parameter sets at once (problem x energy)
+    t, h1, x1, w1, c = (params[:, i, None] for i in range(5))
+
+    return np.where((E > t) & (E < eps_1), h1 * np.exp(-(E - x1)**2 / w1), 0.) + np.where((E > eps_1) & (E < eps_max), c, 0.)
+
+# ----------------------------------------------------------------------------------------------------
+def diagnostics(E, sigma, params, iterations, converged):
+
+    model = model_matrix(E, params)
+    fitted = (E[None, :] > params[:, 0, None]) & (E[None, :] < eps_max)
+    difference = np.where(fitted, model - sigma, 0.)
+    norm = np.sqrt(np.where(fitted, sigma**2, 0.).sum(axis = 1))
+
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        return {'rms': np.sqrt((difference**2).sum(axis = 1) / np.maximum(fitted.sum(axis = 1), 1)), # mb
+                'relative_error': np.sqrt((difference**2).sum(axis = 1)) / norm,
+                'integral_ratio': np.trapezoid(model, E, axis = 1) / np.trapezoid(sigma, E, axis = 1),
+                'iterations': iterations, 'converged': converged}
+
+# ----------------------------------------------------------------------------------------------------
+def refit(tendl_dir = TENDL_DIR, E = fit_grid):
+
+    # New table (structured array with the dtype of v2r4_table), the fitted rows and the diagnostics of the N and alpha fits
+    table = np.array(load_table()[0])
+    names = [f'{get_cross_section_TENDL.elements.get(int(Z), "")}{int(A)}' for A, Z in zip(table['A'], table['Z'])]
+    rows = np.array([irow for irow, name in enumerate(names)
+                     if os.path.exists(bundle_path(name, tendl_dir)) or os.path.isdir(os.path.join(tendl_dir, name))], dtype = int)
+
+    if len(rows) == 0:
+        raise FileNotFoundError(f'No TENDL-2023 bundles for the nuclei of the v2r4 table in {tendl_dir}')
+
+    E, sigma = chart_observables([names[irow] for irow in rows], E, tendl_dir)
+    results = {}
+
+    for ipart, fields in [('N', fields_N), ('alpha', fields_alpha)]:
+        params, results[ipart] = fit_channel(E, np.asarray(sigma[ipart]))
+        for icol, name in enumerate(fields):
+            table[name][rows] = params[:, icol]
+
+    return table, rows, results
+
+# ----------------------------------------------------------------------------------------------------
+def write_table(table, filename = REFIT_FILE):
+
+    with open(filename, 'w') as f:
+        f.write('#A, Z, tN, h1N, x1N, wN1 , cN, tα, h1α, x1α, wα1, cα\n')
+        f.write(f'{len(table)} {eps_1} {eps_max}\n')
+        for row in table:
+            f.write(f"{row['A']} {row['Z']} " + ' '.join(repr(float(row[name])) for name in fields_N) + '\t'
+                    + ' '.join(repr(float(row[name])) for name in fields_alpha) + '\n')
+
+# ----------------------------------------------------------------------------------------------------
+def write_diagnostics(table, rows, results, filename):
+
+    columns = ['rms', 'relative_error', 'integral_ratio', 'iterations', 'converged']
+
+    with open(filename, 'w') as f:
+        f.write('#A Z ' + ' '.join(f'{name}_{ipart}' for ipart in results for name in columns) + '\n')
+        for i, irow in enumerate(rows):
+            values = [results[ipart][name][i] for ipart in results for name in columns]
+            f.write(f"{table['A'][irow]} {table['Z'][irow]} " + ' '.join(f'{value:.6g}' if isinstance(value, float) else str(int(value)) for value in values) + '\n')
+
+# ----------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    output_file = sys.argv[1] if len(sys.argv) > 1 else REFIT_FILE
+    diagnostics_file = os.path.splitext(output_file)[0] + '_diagnostics.txt'
+
+    table, rows, results = refit()
+    write_table(table, output_file)
+    write_diagnostics(table, rows, results, diagnostics_file)
+
+    for ipart in results:
+        print(f"{ipart}: {len(rows)} nuclei refitted, median relative error {np.nanmedian(results[ipart]['relative_error']):.3g}, "
+              f"{np.count_nonzero(~results[ipart]['converged'])} not converged")
+    print(f'{len(table) - len(rows)} nuclei without TENDL-2023 bundle kept as they were')
+    print(f'Parameters written to {os.path.relpath(output_file)}, diagnostics to {os.path.relpath(diagnostics_file)}')
+
+# ----------------------------------------------------------------------------------------------------
@@ -0,0 +1,269 @@
+import argparse
+import ast
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import glob
+import hashlib
+import importlib
+import multiprocessing
+import os
+import sys
+import time
+import warnings
+
+from pipeline import load_state, save_state
+
+# Renders the figures of plots/ (into figs/) and of luciana/scripts (into luciana/figures/) in parallel.
+# Every target is one call of a plotting function; it is fingerprinted from its input data files (globs
+# below) and from the source of its module and of every local module that module imports, and it is only
+# rendered again when that fingerprint changed since its last successful render or an output is missing.
+# Each target runs in a fresh worker process with the non-interactive Agg backend, so rcParams set by one
+# script do not leak into another and plt.show() returns immediately. The slowest targets (by their last
+# recorded render time) are started first.
+# The targets below say how to call each figure (arguments, outputs, input data), which cannot be read from
+# the scripts; they are checked against the plotting entry points found in the plot_*.py modules of both
+# directories (module-level plot_* functions not only used by another one): a target naming a function that
+# does not exist is an error, and entry points without a target are reported.
+# Usage: python3 render_figures.py [-n] [-f] [-k pattern] [number of workers]
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.normpath(os.path.join(SCRIPTS_DIR, '../..'))
+PLOTS_DIR = os.path.join(ROOT_DIR, 'plots')
+FIGS_DIR = os.path.join(ROOT_DIR, 'figs')
+FIGURES_DIR = os.path.join(ROOT_DIR, 'luciana/figures')
+STATE_FILE = os.path.join(FIGURES_DIR, '.render.json')
+
+# Input data, as globs relative to the repository root
+v2r4_table = ['tables/v2r4/xsect_Gauss2_TALYS-restored.txt']
+tendl_cache = ['tables/TENDL2023/cache/objects/*']
+interaction_lengths = ['luciana/results/interaction-length/interactionLength_*.dat']
+
+# ----------------------------------------------------------------------------------------------------
+def talys(*names):
+
+    return [f'tables/TENDL2023/talys_g_{name}.txt' for name in names]
+
+# ----------------------------------------------------------------------------------------------------
+def channels(*nuclei):
+
+    return [pattern.format(nucleus) for nucleus in nuclei for pattern in ['tables/TENDL2023/{}/*', 'tables/TENDL2023/{}.npz']]
+
+# ----------------------------------------------------------------------------------------------------
+def exfor(nucleus):
+
+    return [f'tables/EXFOR/g_{nucleus}_abs_*.txt']
+
+# ----------------------------------------------------------------------------------------------------
+def figs_target(module, function, args, output_file, inputs):
+
+    # plots/ functions take output_file as their last argument, save it in the working directory and read ../tables
+    return {'module': module, 'function': function, 'args': list(args) + [output_file], 'cwd': FIGS_DIR, 'path': [PLOTS_DIR],
+            'outputs': [os.path.join(FIGS_DIR, output_file)], 'inputs': inputs + ['plots/simprop.mplstyle']}
+
+# ----------------------------------------------------------------------------------------------------
+def figures_target(module, function, args, name, inputs):
+
+    # luciana/scripts functions save ../figures/<name>.pdf and .png from the scripts directory
+    return {'module': module, 'function': function, 'args': list(args), 'cwd': SCRIPTS_DIR, 'path': [SCRIPTS_DIR],
+            'outputs': [os.path.join(FIGURES_DIR, name + extension) for extension in ('.pdf', '.png')], 'inputs': inputs}
+
+# ----------------------------------------------------------------------------------------------------
+def targets():
+
+    # name (output path relative to the repository root, without extension) -> target
+    nuclei_v2r4_vs_TENDL = [[14, 7], [28, 14], [56, 26]]
+
+    target_list = [
+        figs_target('plot_data_EXFOR', 'plot_exfor_Fe54', [], 'xsecs_pd_Fe54_EXFOR.pdf', exfor('Fe54') + talys('Fe54_nonelastic') + v2r4_table),
+        figs_target('plot_data_EXFOR', 'plot_exfor_Al27', [], 'xsecs_pd_Al27_EXFOR.pdf', exfor('Al27') + talys('Al27_nonelastic') + v2r4_table),
+        figs_target('plot_data_EXFOR', 'plot_exfor_Mg24', [], 'xsecs_pd_Mg24_EXFOR.pdf', exfor('Mg24') + talys('Mg24_nonelastic') + v2r4_table),
+        figs_target('plot_data_EXFOR', 'plot_exfor_O16', [], 'xsecs_pd_O16_EXFOR.pdf', exfor('O16') + talys('O16_nonelastic') + v2r4_table),
+        figs_target('plot_pd_TALYS', 'plot_talys', [(16, 8)], 'xsecs_pd_O16_TALYS.pdf', talys('O16_nonelastic')),
+        figs_target('plot_pd_v2r4', 'plot_v2r4', [(16, 8)], 'xsecs_pd_O16_v2r4.pdf', v2r4_table),
+        figs_target('plot_pd_exclusive', 'plot_pd_exclusive_xsecs', [], 'xsecs_pd_exclusive_O16_TALYS.pdf', talys('O16_nonelastic') + channels('O16')),
+        figs_target('plot_pd_exclusive', 'plot_pd_prod_xsecs', [], 'xsecs_pd_prod_O16_TALYS.pdf', talys('O16_nprod') + channels('O16')),
+        figs_target('plot_pd_exclusive', 'plot_pd_pa_xsecs', [], 'xsecs_pd_pa_O16_TALYS.pdf', talys('O16_nonelastic') + channels('O16')),
+        figs_target('plot_pd_exclusive', 'plot_pd_sirente_xsecs', [], 'xsecs_pd_sirente_O16_TALYS.pdf', channels('O16', 'Si28', 'Fe56') + v2r4_table),
+        figs_target('plot_pd_exclusive', 'plot_pd_lnA_xsecs', [], 'xsecs_pd_lnA_O16.pdf', channels('O16')),
+
+        figures_target('plot_energy_loss_length', 'plot_energy_loss_length', [], 'energy_loss_length', interaction_lengths),
+        figures_target('plot_energy_loss_length', 'plot_energy_loss_length_inverted_colors', [], 'ELL_inverted_colors', interaction_lengths),
+        figures_target('plot_energy_loss_length', 'plot_energy_loss_length_TENDL2023', [], 'ELL_TENDL2023', interaction_lengths),
+        figures_target('plot_energy_loss_length', 'plot_energy_loss_length_relative_difference', [], 'ELL_relative_difference', interaction_lengths),
+        figures_target('plot_mean_lnA', 'plot_mean_lnA', [], 'mean_lnA', v2r4_table),
+        figures_target('plot_cross_sections', 'plot_cross_sections', [16, 8], 'cross-sections/cross_sections_16O', exfor('O16') + v2r4_table + tendl_cache),
+        figures_target('plot_cross_sections', 'plot_cross_sections', [27, 13], 'cross-sections/cross_sections_27Al', exfor('Al27') + v2r4_table + tendl_cache),
+        figures_target('plot_cross_section_v2r4', 'plot_all_cross_sections_v2r4', [], 'cross-sections/all_cross_sections_v2r4', v2r4_table),
+        figures_target('plot_cross_section_TENDL-2023', 'plot_cross_section_TENDL2023', [], 'cross-sections/cross_sections_TENDL2023', tendl_cache),
+        figures_target('plot_cross_section_TENDL-2023', 'plot_all_cross_sections_TENDL2023', [], 'cross-sections/all_cross_sections_TENDL2023', tendl_cache),
+    ]
+
+    for A, Z in nuclei_v2r4_vs_TENDL:
+        target_list.append(figures_target('plot_cross_section_v2r4', 'plot_cross_section_v2r4', [A, Z],
+                                          f'cross-sections/cross_section_v2r4_A{A:03}Z{Z:03}', v2r4_table))
+        target_list.append(figures_target('plot_cross_section_TENDL-2023', 'plot_cross_section_v2r4_vs_TENDL2023', [A, Z],
+                                          f'cross-sections/cross_section_v2r4_vs_TENDL2023_A{A:03}Z{Z:03}', v2r4_table + tendl_cache))
+
+    check_targets(target_list)
+
+    return {os.path.splitext(os.path.relpath(target['outputs'][0], ROOT_DIR))[0]: target for target in target_list}
+
+# ----------------------------------------------------------------------------------------------------
+def entry_points():
+
+    # (module, function) of every module-level plot_* function of the plot_*.py scripts that no other plot_*
+    # function of its module calls (those are parts of a figure, e.g. the curves of plot_cross_sections)
+    points = set()
+
+    for filename in sorted(glob.glob(os.path.join(PLOTS_DIR, 'plot_*.py')) + glob.glob(os.path.join(SCRIPTS_DIR, 'plot_*.py'))):
+        with open(filename) as f:
+            tree = ast.parse(f.read())
+
+        functions = {node.name: node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name.startswith('plot_')}
+        called = {node.func.id for function in functions.values() for node in ast.walk(function)
+                  if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in functions and node.func.id != function.name}
+
+        module = os.path.splitext(os.path.basename(filename))[0]
+        points |= {(module, name) for name in functions if name not in called}
+
+    return points
+
+# ----------------------------------------------------------------------------------------------------
+def check_targets(target_list):
+
+    # Raise for targets calling a function that does not exist; return the entry points without a target
+    points = entry_points()
+    unknown = sorted({(target['module'], target['function']) for target in target_list} - points)
+
+    if unknown:
+        raise ValueError('Render targets without a matching plotting function: ' + ', '.join(f'{module}.{function}' for module, function in unknown))
+
+    return sorted(points - {(target['module'], target['function']) for target in target_list})
+
+# ----------------------------------------------------------------------------------------------------
+def local_sources(module, path):
+
+    # Source files of a module and of every module it imports, directly or not, that lives in one of the
+    # directories of path (modules loaded with importlib.import_module('name') included)
+    search_dirs = path + [SCRIPTS_DIR] # plots/utils.py puts the scripts directory on sys.path
+    sources = []
+    pending = [module]
+
+    while pending:
+        name = pending.pop()
+        filename = next((os.path.join(directory, name + '.py') for directory in search_dirs if os.path.exists(os.path.join(directory, name + '.py'))), None)
+        if filename is None or filename in sources:
+            continue
+        sources.append(filename)
+
+        with open(filename) as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                pending += [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                pending.append(node.module)
+            elif isinstance(node, ast.Call) and getattr(node.func, 'attr', None) == 'import_module' and node.args and isinstance(node.args[0], ast.Constant):
+                pending.append(node.args[0].value)
+
+    return sorted(sources)
+
+# ----------------------------------------------------------------------------------------------------
+def target_fingerprint(target):
+
+    h = hashlib.sha256(repr((target['module'], target['function'], target['args'])).encode())
+
+    inputs = sorted(set(filename for pattern in target['inputs'] for filename in glob.glob(os.path.join(ROOT_DIR, pattern))))
+
+    for filename in local_sources(target['module'], target['path']) + inputs:
+        h.update(os.path.relpath(filename, ROOT_DIR).encode() + b'\0')
+        with open(filename, 'rb') as f:
+            h.update(hashlib.sha256(f.read()).digest())
+
+    return h.hexdigest()
+
+# ----------------------------------------------------------------------------------------------------
+def render(target):
+
+    # Runs in a worker process: call the plotting function and check that it wrote every output
+    start = time.time()
+
+    os.chdir(target['cwd'])
+    sys.path[:0] = target['path']
+    warnings.filterwarnings('ignore', message = '.*non-interactive.*') # plt.show() with Agg
+
+    module = importlib.import_module(target['module'])
+    getattr(module, target['function'])(*target['args'])
+
+    # plots/utils.savefig reports errors instead of raising them
+    missing = [filename for filename in target['outputs'] if not os.path.exists(filename) or os.path.getmtime(filename) < start - 1.]
+    if missing:
+        raise RuntimeError(f'{", ".join(os.path.relpath(filename, ROOT_DIR) for filename in missing)} not written')
+
+    return time.time() - start
+
+# ----------------------------------------------------------------------------------------------------
+def run(pattern = '', dry_run = False, force = False, max_workers = None, state_file = STATE_FILE):
+
+    state = load_state(state_file)
+    all_targets = targets()
+    selected = {name: target for name, target in all_targets.items() if pattern in name}
+
+    uncovered = check_targets(list(all_targets.values()))
+    if uncovered:
+        print(f'{len(uncovered)} plotting functions have no render target: ' + ', '.join(f'{module}.{function}' for module, function in uncovered))
+
+    fingerprints = {name: target_fingerprint(target) for name, target in selected.items()}
+    stale = [name for name, target in selected.items()
+             if force or state.get(name, {}).get('fingerprint') != fingerprints[name] or not all(os.path.exists(filename) for filename in target['outputs'])]
+
+    print(f'{len(stale)} of {len(selected)} figures to render')
+    for name in stale:
+        print(f'  {name}')
+
+    if dry_run or not stale:
+        return []
+
+    # Slowest first, so that the total time is close to that of the slowest figure
+    stale.sort(key = lambda name: -state.get(name, {}).get('seconds', float('inf')))
+
+    for target in selected.values():
+        for filename in target['outputs']:
+            os.makedirs(os.path.dirname(filename), exist_ok = True)
+
+    os.environ['LUCIANA_PLOT_BACKEND'] = 'Agg' # inherited by the workers
+    failed = []
+    start = time.time()
+
+    with ProcessPoolExecutor(max_workers = max_workers or os.cpu_count(), mp_context = multiprocessing.get_context('spawn'), max_tasks_per_child = 1) as executor:
+        futures = {executor.submit(render, selected[name]): name for name in stale}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                seconds = future.result()
+            except Exception as e:
+                print(f'{name}: failed ({type(e).__name__}: {e})')
+                failed.append(name)
+                continue
+            print(f'{name}: rendered in {seconds:.1f} s')
+            state[name] = {'fingerprint': fingerprints[name], 'seconds': seconds}
+            save_state(state, state_file)
+
+    print(f'{len(stale) - len(failed)} figures rendered, {len(failed)} failed, in {time.time() - start:.1f} s')
+
+    return failed
+
+# ----------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description = 'Render the figures of plots/ and luciana/scripts whose inputs or code changed')
+    parser.add_argument('max_workers', nargs = '?', type = int, default = None, help = 'number of worker processes')
+    parser.add_argument('-n', dest = 'dry_run', action = 'store_true', help = 'only list the figures that would be rendered')
+    parser.add_argument('-f', dest = 'force', action = 'store_true', help = 'render every selected figure')
+    parser.add_argument('-k', dest = 'pattern', default = '', help = 'only figures whose name contains this string')
+    arguments = parser.parse_args()
+
+    failed = run(arguments.pattern, arguments.dry_run, arguments.force, arguments.max_workers)
+
+    sys.exit(1 if failed else 0)
+
+# ----------------------------------------------------------------------------------------------------
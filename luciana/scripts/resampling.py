@@ -0,0 +1,82 @@
+from collections import OrderedDict
+import hashlib
+
+import numpy as np
+
+# Resampling of cross sections between energy grids. Mapping values tabulated on a source grid onto a target
+# grid (by default the canonical log-energy grid of interaction_lengths.energy_grid) is linear interpolation,
+# zero outside the source range, written as a sparse (target x source) operator with two entries per row.
+# Operators are cached per (source grid, target grid) pair, so tables sharing a grid (every channel of a
+# TENDL-2023 bundle, repeated calls on the same table) are resampled with one sparse product, and
+# cross sections from different sources can be added, differenced or integrated on the same grid.
+
+max_cached = 256
+
+_operators = OrderedDict()
+
+# ----------------------------------------------------------------------------------------------------
+def canonical_grid():
+
+    # Imported here: interaction_lengths depends on cross_sections, which resamples through this module
+    from interaction_lengths import energy_grid
+
+    return energy_grid() # MeV
+
+# ----------------------------------------------------------------------------------------------------
+def _key(grid):
+
+    return (grid.shape, hashlib.sha1(grid.tobytes()).hexdigest())
+
+# ----------------------------------------------------------------------------------------------------
+def build_operator(source, target):
+
+    # (target x source) CSR matrix W with W @ y = np.interp(target, source, y, left = 0., right = 0.) for a
+    # non-decreasing source grid. scipy.sparse is slow to import, so it is only loaded once an operator is needed.
+    from scipy import sparse
+
+    inside = np.flatnonzero((target >= source[0]) & (target <= source[-1]))
+
+    if len(source) < 2:
+        return sparse.csr_matrix((np.ones(len(inside)), (inside, np.zeros(len(inside), dtype = int))), shape = (len(target), len(source)))
+
+    i = np.clip(np.searchsorted(source, target[inside], side = 'right') - 1, 0, len(source) - 2)
+    width = source[i + 1] - source[i]
+    t = np.divide(target[inside] - source[i], width, out = np.ones(len(inside)), where = width > 0)
+
+    rows = np.concatenate([inside, inside])
+    columns = np.concatenate([i, i + 1])
+    weights = np.concatenate([1. - t, t])
+
+    return sparse.csr_matrix((weights, (rows, columns)), shape = (len(target), len(source)))
+
+# ----------------------------------------------------------------------------------------------------
+def interpolation_operator(source, target = None):
+
+    source = np.ascontiguousarray(source, dtype = float)
+    target = canonical_grid() if target is None else np.ascontiguousarray(target, dtype = float)
+
+    key = (_key(source), _key(target))
+    if key in _operators:
+        _operators.move_to_end(key)
+        return _operators[key]
+
+    operator = build_operator(source, target)
+    _operators[key] = operator
+    if len(_operators) > max_cached:
+        _operators.popitem(last = False)
+
+    return operator
+
+# ----------------------------------------------------------------------------------------------------
+def resample(source, values, target = None):
+
+    # values (..., source) -> (..., target), the last axis being the energy axis
+    values = np.asarray(values, dtype = float)
+    operator = interpolation_operator(source, target)
+
+    if values.ndim == 1:
+        return operator @ values
+
+    return (operator @ values.reshape(-1, values.shape[-1]).T).T.reshape(values.shape[:-1] + (operator.shape[0],))
+
+# ----------------------------------------------------------------------------------------------------
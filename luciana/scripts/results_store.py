@@ -0,0 +1,303 @@
+from contextlib import contextmanager
+import fcntl
+import json
+import os
+import socket
+import tempfile
+import time
+
+import numpy as np
+
+import instrumentation
+
+# Columnar store of interaction lengths along the (A, Z, model, photon field, Gmm) axes:
+#   Gmm.f8, E.f8, interaction_length.f8   raw float64 columns (E = A Gmm mp [eV], interaction length [Mpc]),
+#                                         appended chunk by chunk and read as memory maps
+#   index.json                            one entry per chunk: A, Z, model, field, offset, rows and provenance
+# A chunk is one (A, Z, model, field) curve; appending the same key again supersedes the previous chunk.
+# The index is only rewritten after the columns are flushed, so bytes past the last indexed row are
+# leftovers of an interrupted append and are truncated by the next one.
+# Once superseded rows outnumber live ones, the store is compacted: the live chunks are copied into
+# <column>.f8.compact files, their index into index.json.compact (written last, it marks the copy as
+# complete), and these replace the store files. An interrupted compaction is completed, or discarded if its
+# index was not written yet, by the next writer or reader. Writers hold an exclusive lock and readers a
+# shared one, so a reader never maps columns that do not match the index it read.
+# A curve only found as a legacy text file is imported when first read, and imported again whenever the
+# size or modification time of the text file differs from the ones recorded in its chunk.
+
+STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../results/interaction-length/store')
+TEXT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../results/interaction-length')
+
+columns = ['Gmm', 'E', 'interaction_length']
+
+mp = 1.e9 # 1 GeV
+
+# ----------------------------------------------------------------------------------------------------
+def text_filename(A, Z, model, text_dir = TEXT_DIR):
+
+    return os.path.join(text_dir, 'interactionLength_A{0:03}Z{1:03}_{2}.dat'.format(A, Z, model))
+
+# ----------------------------------------------------------------------------------------------------
+def read_index(store_dir = STORE_DIR):
+
+    try:
+        with open(os.path.join(store_dir, 'index.json')) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'rows': 0, 'chunks': []}
+
+# ----------------------------------------------------------------------------------------------------
+def _write_index(index, store_dir, name = 'index.json'):
+
+    fd, tmp_filename = tempfile.mkstemp(dir = store_dir, prefix = '.tmp-')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(index, f, indent = 1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_filename, 0o644)
+        os.replace(tmp_filename, os.path.join(store_dir, name))
+    except BaseException:
+        os.unlink(tmp_filename)
+        raise
+
+# ----------------------------------------------------------------------------------------------------
+@contextmanager
+def _locked(store_dir, shared = False):
+
+    # Appends from parallel workers (run_interaction_length_jobs.py) are serialized with an advisory lock;
+    # an interrupted compaction is finished before anything else touches the store
+    os.makedirs(store_dir, exist_ok = True)
+    with open(os.path.join(store_dir, '.lock'), 'w') as lock:
+        if shared and os.path.exists(os.path.join(store_dir, 'index.json.compact')):
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            _finish_compaction(store_dir)
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+        fcntl.flock(lock, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            if not shared:
+                _finish_compaction(store_dir)
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+# ----------------------------------------------------------------------------------------------------
+def _finish_compaction(store_dir):
+
+    if not os.path.exists(os.path.join(store_dir, 'index.json.compact')):
+        for column in columns:
+            if os.path.exists(os.path.join(store_dir, column + '.f8.compact')):
+                os.unlink(os.path.join(store_dir, column + '.f8.compact'))
+        return
+
+    for column in columns:
+        if os.path.exists(os.path.join(store_dir, column + '.f8.compact')):
+            os.replace(os.path.join(store_dir, column + '.f8.compact'), os.path.join(store_dir, column + '.f8'))
+    os.replace(os.path.join(store_dir, 'index.json.compact'), os.path.join(store_dir, 'index.json'))
+
+# ----------------------------------------------------------------------------------------------------
+def live_chunks(index):
+
+    # The latest chunk of every (A, Z, model, field) key, in the order they were appended
+    latest = {(chunk['A'], chunk['Z'], chunk['model'], chunk['field']): chunk for chunk in index['chunks']}
+
+    return sorted(latest.values(), key = lambda chunk: chunk['offset'])
+
+# ----------------------------------------------------------------------------------------------------
+def _compact(index, store_dir):
+
+    # Copy the live chunks into fresh columns; called with the exclusive lock held
+    chunks = live_chunks(index)
+    rows = np.concatenate([np.arange(chunk['offset'], chunk['offset'] + chunk['rows']) for chunk in chunks]) if chunks else np.zeros(0, dtype = int)
+
+    for column in columns:
+        values = np.fromfile(os.path.join(store_dir, column + '.f8'), dtype = '<f8', count = index['rows'])[rows]
+        with open(os.path.join(store_dir, column + '.f8.compact'), 'wb') as f:
+            f.write(values.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    offset = 0
+    compacted = {'rows': len(rows), 'chunks': []}
+    for chunk in chunks:
+        compacted['chunks'].append(dict(chunk, offset = offset))
+        offset += chunk['rows']
+
+    _write_index(compacted, store_dir, 'index.json.compact')
+    _finish_compaction(store_dir)
+
+    return compacted
+
+# ----------------------------------------------------------------------------------------------------
+def compact(store_dir = STORE_DIR):
+
+    # Drop every superseded chunk from the store now
+    with _locked(store_dir):
+        return _compact(read_index(store_dir), store_dir)
+
+# ----------------------------------------------------------------------------------------------------
+@instrumentation.timed('write.store')
+def _append(index, A, Z, model, Gmm, E, interaction_length, field, provenance, store_dir):
+
+    # Append one chunk to the columns and the index; called with the exclusive lock held
+    for column, values in zip(columns, [Gmm, E, interaction_length]):
+        with open(os.path.join(store_dir, column + '.f8'), 'ab') as f:
+            f.truncate(8 * index['rows'])
+            f.write(values.tobytes())
+            instrumentation.count('write.bytes', values.nbytes)
+            f.flush()
+            os.fsync(f.fileno())
+
+    index['chunks'].append({'A': int(A), 'Z': int(Z), 'model': model, 'field': field,
+                            'offset': index['rows'], 'rows': len(Gmm),
+                            'provenance': {'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'host': socket.gethostname(), **(provenance or {})}})
+    index['rows'] += len(Gmm)
+
+    _write_index(index, store_dir)
+
+    if 2 * sum(chunk['rows'] for chunk in live_chunks(index)) < index['rows']:
+        _compact(index, store_dir)
+
+# ----------------------------------------------------------------------------------------------------
+def _column_values(A, Gmm, E, interaction_length):
+
+    Gmm = np.ascontiguousarray(Gmm, dtype = '<f8')
+    E = np.ascontiguousarray(Gmm * A * mp if E is None else E, dtype = '<f8')
+    interaction_length = np.ascontiguousarray(interaction_length, dtype = '<f8')
+
+    if Gmm.shape != interaction_length.shape or Gmm.shape != E.shape or Gmm.ndim != 1:
+        raise ValueError(f'Gmm, E and interaction_length must be 1D arrays of the same length, got {Gmm.shape}, {E.shape} and {interaction_length.shape}')
+
+    return Gmm, E, interaction_length
+
+# ----------------------------------------------------------------------------------------------------
+def append(A, Z, model, Gmm, interaction_length, field = 'CMB', provenance = None, store_dir = STORE_DIR, E = None):
+
+    Gmm, E, interaction_length = _column_values(A, Gmm, E, interaction_length)
+
+    with _locked(store_dir):
+        _append(read_index(store_dir), A, Z, model, Gmm, E, interaction_length, field, provenance, store_dir)
+
+# ----------------------------------------------------------------------------------------------------
+def load_columns(store_dir = STORE_DIR):
+
+    # Memory-mapped columns of every indexed row, plus the index. The maps stay valid when a later
+    # compaction replaces the files.
+    if not os.path.exists(os.path.join(store_dir, 'index.json')) and not os.path.exists(os.path.join(store_dir, 'index.json.compact')):
+        return {column: np.zeros(0) for column in columns}, read_index(store_dir)
+
+    with _locked(store_dir, shared = True):
+        index = read_index(store_dir)
+
+        if index['rows'] == 0:
+            return {column: np.zeros(0) for column in columns}, index
+
+        return {column: np.memmap(os.path.join(store_dir, column + '.f8'), dtype = '<f8', mode = 'r', shape = (index['rows'],))
+                for column in columns}, index
+
+# ----------------------------------------------------------------------------------------------------
+def find_chunk(index, A, Z, model, field = 'CMB'):
+
+    for chunk in reversed(index['chunks']):
+        if (chunk['A'], chunk['Z'], chunk['model'], chunk['field']) == (A, Z, model, field):
+            return chunk
+
+    return None
+
+# ----------------------------------------------------------------------------------------------------
+def _text_changed(chunk, filename):
+
+    # True for a chunk imported from a text file that has been modified (or replaced) since
+    provenance = chunk['provenance']
+
+    if provenance.get('source') != os.path.basename(filename) or not os.path.exists(filename):
+        return False
+
+    stat = os.stat(filename)
+
+    return (provenance.get('size'), provenance.get('mtime_ns')) != (stat.st_size, stat.st_mtime_ns)
+
+# ----------------------------------------------------------------------------------------------------
+def _needs_import(index, A, Z, model, field, text_dir):
+
+    # True if the curve is not in the store, or was imported from a text file that changed since
+    chunk = find_chunk(index, A, Z, model, field)
+
+    return chunk is None or _text_changed(chunk, text_filename(A, Z, model, text_dir))
+
+# ----------------------------------------------------------------------------------------------------
+def import_text(A, Z, model, field = 'CMB', store_dir = STORE_DIR, text_dir = TEXT_DIR, if_needed = False):
+
+    # Load a legacy interactionLength_*.dat file (E [eV], interaction length [Mpc]) into the store. With
+    # if_needed, nothing is done when the store already holds the curve, e.g. imported by another process
+    # since the caller looked: the check and the append are made under one exclusive lock.
+    filename = text_filename(A, Z, model, text_dir)
+
+    with _locked(store_dir):
+        index = read_index(store_dir)
+        if if_needed and not _needs_import(index, A, Z, model, field, text_dir):
+            return
+
+        stat = os.stat(filename)
+        with instrumentation.stage('parse.text'):
+            E, interaction_length = np.loadtxt(filename, unpack = True, ndmin = 2)
+        instrumentation.count('parse.bytes_read', stat.st_size)
+
+        provenance = {'source': os.path.basename(filename), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        _append(index, A, Z, model, *_column_values(A, E / (A * mp), E, interaction_length), field, provenance, store_dir)
+
+# ----------------------------------------------------------------------------------------------------
+def _read_rows(A, Z, model, field, store_dir, text_dir):
+
+    # Memory-mapped columns of one curve; a curve that only exists as a legacy text file is imported the first
+    # time it is read, and again after the text file changed
+    A, Z = int(A), int(Z)
+    data, index = load_columns(store_dir)
+
+    if _needs_import(index, A, Z, model, field, text_dir):
+        import_text(A, Z, model, field, store_dir, text_dir, if_needed = True)
+        data, index = load_columns(store_dir)
+
+    chunk = find_chunk(index, A, Z, model, field)
+    rows = slice(chunk['offset'], chunk['offset'] + chunk['rows'])
+
+    return {column: data[column][rows] for column in columns}
+
+# ----------------------------------------------------------------------------------------------------
+def read_interaction_length(A, Z, model, field = 'CMB', store_dir = STORE_DIR, text_dir = TEXT_DIR):
+
+    # (Gmm, interaction length [Mpc]) as read-only views of the store
+    data = _read_rows(A, Z, model, field, store_dir, text_dir)
+
+    return data['Gmm'], data['interaction_length']
+
+# ----------------------------------------------------------------------------------------------------
+def read_energy_interaction_length(A, Z, model, field = 'CMB', store_dir = STORE_DIR, text_dir = TEXT_DIR):
+
+    # Same as read_interaction_length with the nucleus energy E [eV] instead of Gmm
+    data = _read_rows(A, Z, model, field, store_dir, text_dir)
+
+    return data['E'], data['interaction_length']
+
+# ----------------------------------------------------------------------------------------------------
+@instrumentation.timed('write.text')
+def export_text(A, Z, model, field = 'CMB', store_dir = STORE_DIR, text_dir = TEXT_DIR):
+
+    # Write the stored curve as a legacy tab-separated interactionLength_*.dat file
+    E, interaction_length = read_energy_interaction_length(A, Z, model, field, store_dir, text_dir)
+    filename = text_filename(A, Z, model, text_dir)
+
+    fd, tmp_filename = tempfile.mkstemp(dir = text_dir, prefix = '.tmp-')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            np.savetxt(f, np.column_stack([E, interaction_length]), fmt = '%.15e', delimiter = '\t')
+        os.chmod(tmp_filename, 0o644)
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        os.unlink(tmp_filename)
+        raise
+
+    return filename
+
+# ----------------------------------------------------------------------------------------------------
@@ -0,0 +1,75 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import os
+import sys
+import time
+
+import instrumentation
+from write_interaction_length_file import write_interaction_length_file
+
+# Usage: python3 run_interaction_length_jobs.py [jobs file] [number of workers]
+# The jobs file lists one 'A Z model' job per line; lines starting with '#' are ignored.
+
+# ----------------------------------------------------------------------------------------------------
+def read_jobs(filename):
+
+    jobs = []
+
+    with open(filename) as f:
+        for line in f:
+            line = line.split('#')[0].strip()
+            if not line:
+                continue
+            A, Z, model = line.split()
+            jobs.append((int(A), int(Z), model))
+
+    return jobs
+
+# ----------------------------------------------------------------------------------------------------
+def run_job(A, Z, model):
+
+    # Also returns the stages and counters recorded by the job, as workers never write a profile themselves
+    start = time.perf_counter()
+    with instrumentation.collected() as stats:
+        filename = write_interaction_length_file(A, Z, model)
+
+    return filename, time.perf_counter() - start, stats
+
+# ----------------------------------------------------------------------------------------------------
+def run_jobs(jobs, max_workers = None):
+
+    max_workers = max_workers or os.cpu_count()
+    failed = []
+
+    # Workers record stages and counters whenever this process does (LUCIANA_PROFILE or instrumentation.enable())
+    initializer = instrumentation.enable if instrumentation.enabled else None
+
+    with ProcessPoolExecutor(max_workers = max_workers, initializer = initializer) as executor:
+        futures = {executor.submit(run_job, *job): job for job in jobs}
+
+        for future in as_completed(futures):
+            A, Z, model = futures[future]
+            try:
+                filename, wall_time, stats = future.result()
+                instrumentation.merge(stats)
+                print(f'A = {A:3d}, Z = {Z:3d}, {model:<10}  {wall_time:8.3f} s  {os.path.relpath(filename)}')
+            except Exception as e:
+                print(f'A = {A:3d}, Z = {Z:3d}, {model:<10}  failed: {e}')
+                failed.append((A, Z, model))
+
+    return failed
+
+# ----------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    jobs_file = sys.argv[1] if len(sys.argv) > 1 else 'interaction_length_jobs.txt'
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    jobs = read_jobs(jobs_file)
+
+    start = time.perf_counter()
+    failed = run_jobs(jobs, max_workers)
+    print(f'{len(jobs) - len(failed)}/{len(jobs)} jobs done in {time.perf_counter() - start:.3f} s')
+
+    sys.exit(1 if failed else 0)
+
+# ----------------------------------------------------------------------------------------------------
@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import instrumentation
+
+# Content-addressed cache for files fetched from the TENDL web site:
+#   objects/<sha256 of content>  raw file content
+#   refs/<sha256 of url>.json    url, HTTP status, content checksum, size and fetch time
+# Environment overrides: TENDL_CACHE_DIR, TENDL_CACHE_TTL (seconds, < 0 never expires), TENDL_TIMEOUT (seconds),
+# TENDL_OFFLINE=1. CACHE_DIR and OFFLINE are read at every call, so they can also be changed at run time.
+
+CACHE_DIR = os.environ.get('TENDL_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../tables/TENDL2023/cache'))
+TTL = float(os.environ.get('TENDL_CACHE_TTL', 30 * 24 * 3600)) # s
+TIMEOUT = float(os.environ.get('TENDL_TIMEOUT', 30)) # s, per connection attempt and between bytes received
+OFFLINE = os.environ.get('TENDL_OFFLINE', '0') not in ('', '0')
+
+# ----------------------------------------------------------------------------------------------------
+class OfflineCacheMiss(OSError):
+
+    # Raised in offline mode for a url without a cached answer
+    pass
+
+# ----------------------------------------------------------------------------------------------------
+def _sha256(data):
+
+    return hashlib.sha256(data).hexdigest()
+
+# ----------------------------------------------------------------------------------------------------
+def _ref_path(url, cache_dir):
+
+    return os.path.join(cache_dir, 'refs', _sha256(url.encode()) + '.json')
+
+# ----------------------------------------------------------------------------------------------------
+def _object_path(checksum, cache_dir):
+
+    return os.path.join(cache_dir, 'objects', checksum)
+
+# ----------------------------------------------------------------------------------------------------
+def _write_atomic(path, data):
+
+    os.makedirs(os.path.dirname(path), exist_ok = True)
+    fd, tmp = tempfile.mkstemp(dir = os.path.dirname(path), prefix = '.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+# ----------------------------------------------------------------------------------------------------
+def read_entry(url, cache_dir = None):
+
+    # Return (metadata, content) for a cached url, or (None, None) if it is missing or corrupted
+    cache_dir = CACHE_DIR if cache_dir is None else cache_dir
+    try:
+        with open(_ref_path(url, cache_dir)) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None, None
+
+    if meta['status'] != 200:
+        return meta, b''
+
+    try:
+        with open(_object_path(meta['sha256'], cache_dir), 'rb') as f:
+            content = f.read()
+    except OSError:
+        return None, None
+
+    if _sha256(content) != meta['sha256']:
+        print(f'Checksum mismatch for cached copy of {url}, discarding it')
+        return None, None
+
+    return meta, content
+
+# ----------------------------------------------------------------------------------------------------
+def write_entry(url, status, content, cache_dir = None):
+
+    cache_dir = CACHE_DIR if cache_dir is None else cache_dir
+    meta = {'url': url, 'status': status, 'sha256': None, 'size': 0, 'fetched': time.time()}
+
+    if status == 200:
+        meta['sha256'] = _sha256(content)
+        meta['size'] = len(content)
+        path = _object_path(meta['sha256'], cache_dir)
+        if not os.path.exists(path):
+            _write_atomic(path, content)
+
+    _write_atomic(_ref_path(url, cache_dir), json.dumps(meta).encode())
+
+    return meta
+
+# ----------------------------------------------------------------------------------------------------
+def cached_entries(status = 200, cache_dir = None):
+
+    # Metadata of every cached answer of the given HTTP status, sorted by url
+    cache_dir = CACHE_DIR if cache_dir is None else cache_dir
+    entries = []
+
+    for filename in sorted(os.listdir(os.path.join(cache_dir, 'refs')) if os.path.isdir(os.path.join(cache_dir, 'refs')) else []):
+        try:
+            with open(os.path.join(cache_dir, 'refs', filename)) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if meta['status'] == status:
+            entries.append(meta)
+
+    return sorted(entries, key = lambda meta: meta['url'])
+
+# ----------------------------------------------------------------------------------------------------
+def cached_urls(status = 200, cache_dir = None):
+
+    # URLs with a cached answer of the given HTTP status
+    return [meta['url'] for meta in cached_entries(status, cache_dir)]
+
+# ----------------------------------------------------------------------------------------------------
+@instrumentation.timed('fetch')
+def fetch(url, ttl = None, offline = None, cache_dir = None, timeout = None):
+
+    # Return (status, text) for url, going to the network only when the cached copy is missing or older than ttl.
+    # Negative answers (e.g. 404 for a nucleus TENDL does not cover) are cached as well.
+    ttl = TTL if ttl is None else ttl
+    timeout = TIMEOUT if timeout is None else timeout
+    offline = OFFLINE if offline is None else offline
+    cache_dir = CACHE_DIR if cache_dir is None else cache_dir
+
+    meta, content = read_entry(url, cache_dir)
+
+    if meta is not None and (offline or ttl < 0 or time.time() - meta['fetched'] < ttl):
+        instrumentation.count('fetch.cache_hits')
+        instrumentation.count('fetch.bytes_read', len(content))
+        return meta['status'], content.decode()
+
+    instrumentation.count('fetch.cache_misses')
+
+    if offline:
+        raise OfflineCacheMiss(f'No cached copy of {url} available in offline mode')
+
+    import requests # only needed on a cache miss, and slow to import
+
+    try:
+        response = requests.get(url, timeout = timeout)
+    except requests.RequestException as e:
+        if meta is not None:
+            print(f'Could not refresh {url} ({e}), using the cached copy')
+            return meta['status'], content.decode()
+        raise
+
+    if response.status_code not in (200, 404): # transient server errors are never cached
+        if meta is not None:
+            return meta['status'], content.decode()
+        return response.status_code, ''
+
+    instrumentation.count('fetch.bytes_downloaded', len(response.content))
+    write_entry(url, response.status_code, response.content, cache_dir)
+
+    return response.status_code, response.content.decode()
+
+# ----------------------------------------------------------------------------------------------------
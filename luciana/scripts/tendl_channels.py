@@ -0,0 +1,159 @@
+import glob
+import os
+import re
+import struct
+import sys
+import zipfile
+
+import numpy as np
+
+import instrumentation
+
+# One bundle per nucleus replaces the thousands of TENDL2023/<nucleus>/talys_g_<nucleus>_<code>.txt files:
+#   E      (energy,)            MeV, union of the energy grids of all channel files
+#   codes  (channel, 6)         emitted (n, p, d, t, h, alpha) of each channel
+#   sigma  (channel, energy)    mb, zero outside the range tabulated for a channel
+#   stamps (channel, 2)         size and modification time [ns] of each channel file when it was packed
+# Bundles are uncompressed .npz files, so every member can be opened as a memory map. A bundle is packed
+# again when the channel files in TENDL2023/<nucleus>/ no longer match its stamps (a channel added, removed,
+# downloaded again or edited); a bundle without its nucleus directory is used as it is.
+
+TENDL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../tables/TENDL2023')
+
+particles = ['n', 'p', 'd', 't', 'h', 'alpha']
+
+channel_file = re.compile(r'talys_g_.+_(\d{6})\.txt$')
+
+# ----------------------------------------------------------------------------------------------------
+def bundle_path(nucleus, tendl_dir = TENDL_DIR):
+
+    return os.path.join(tendl_dir, f'{nucleus}.npz')
+
+# ----------------------------------------------------------------------------------------------------
+def code_string(code):
+
+    return ''.join(str(int(i)) for i in code)
+
+# ----------------------------------------------------------------------------------------------------
+def channel_files(nucleus, tendl_dir = TENDL_DIR):
+
+    # (filename, code string) of every channel file of TENDL2023/<nucleus>/, in packing order
+    files = []
+
+    for filename in sorted(glob.glob(os.path.join(tendl_dir, nucleus, 'talys_g_*.txt'))):
+        match = channel_file.search(os.path.basename(filename))
+        if match:
+            files.append((filename, match.group(1)))
+
+    return files
+
+# ----------------------------------------------------------------------------------------------------
+def _stamps(files):
+
+    stamps = np.zeros((len(files), 2), dtype = np.int64)
+
+    for ifile, (filename, _) in enumerate(files):
+        stat = os.stat(filename)
+        stamps[ifile] = stat.st_size, stat.st_mtime_ns
+
+    return stamps
+
+# ----------------------------------------------------------------------------------------------------
+@instrumentation.timed('parse.channels')
+def pack_nucleus(nucleus, tendl_dir = TENDL_DIR):
+
+    # Read every channel file of TENDL2023/<nucleus>/ once and write TENDL2023/<nucleus>.npz
+    files = channel_files(nucleus, tendl_dir)
+    stamps = _stamps(files)
+    codes = []
+    tables = []
+
+    for filename, code in files:
+        E, sigma = np.loadtxt(filename, usecols = (0, 1), unpack = True, ndmin = 2)
+        instrumentation.count('parse.bytes_read', os.path.getsize(filename))
+        codes.append([int(i) for i in code])
+        tables.append((E, sigma))
+
+    if not tables:
+        raise FileNotFoundError(f'No channel files found in {os.path.join(tendl_dir, nucleus)}')
+
+    E = np.unique(np.concatenate([E_channel for E_channel, _ in tables]))
+    sigma = np.array([np.interp(E, E_channel, sigma_channel, left = 0., right = 0.) for E_channel, sigma_channel in tables])
+
+    filename = bundle_path(nucleus, tendl_dir)
+    tmp_filename = filename + '.tmp.npz'
+    try:
+        np.savez(tmp_filename, E = E, codes = np.array(codes, dtype = np.int8), sigma = sigma, stamps = stamps)
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        if os.path.exists(tmp_filename):
+            os.unlink(tmp_filename)
+        raise
+
+    return filename
+
+# ----------------------------------------------------------------------------------------------------
+def _memmap_npz(filename):
+
+    # Members of an uncompressed .npz are stored contiguously: map each .npy payload in place
+    arrays = {}
+
+    with zipfile.ZipFile(filename) as archive, open(filename, 'rb') as f:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f'{filename} is compressed and cannot be memory-mapped')
+
+            f.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack('<HH', f.read(4))
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+
+            arrays[info.filename[:-len('.npy')]] = np.memmap(filename, dtype = dtype, mode = 'r', offset = f.tell(),
+                                                              shape = shape, order = 'F' if fortran_order else 'C')
+
+    return arrays
+
+# ----------------------------------------------------------------------------------------------------
+def is_stale(nucleus, arrays, tendl_dir = TENDL_DIR):
+
+    # True if the channel files of the nucleus directory differ from the ones the bundle was packed from
+    if not os.path.isdir(os.path.join(tendl_dir, nucleus)):
+        return False
+
+    files = channel_files(nucleus, tendl_dir)
+
+    if 'stamps' not in arrays or [code for _, code in files] != [code_string(code) for code in arrays['codes']]:
+        return True
+
+    return not np.array_equal(_stamps(files), arrays['stamps'])
+
+# ----------------------------------------------------------------------------------------------------
+def load_bundle(nucleus, tendl_dir = TENDL_DIR):
+
+    # Return (E, codes, sigma) memory-mapped, packing the nucleus directory first if there is no bundle yet
+    # or its channel files changed since it was packed
+    filename = bundle_path(nucleus, tendl_dir)
+
+    if not os.path.exists(filename) or is_stale(nucleus, _memmap_npz(filename), tendl_dir):
+        pack_nucleus(nucleus, tendl_dir)
+
+    arrays = _memmap_npz(filename)
+
+    return arrays['E'], arrays['codes'], arrays['sigma'] # MeV, -, mb
+
+# ----------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    # Pack the nuclei given on the command line, or every nucleus directory in TENDL2023/
+    nuclei = sys.argv[1:] or sorted(name for name in os.listdir(TENDL_DIR) if os.path.isdir(os.path.join(TENDL_DIR, name)))
+
+    for nucleus in nuclei:
+        filename = pack_nucleus(nucleus)
+        print(f'{nucleus}: {len(load_bundle(nucleus)[1])} channels packed into {os.path.relpath(filename)}')
+
+# ----------------------------------------------------------------------------------------------------
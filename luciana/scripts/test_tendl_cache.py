@@ -0,0 +1,117 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import time
+
+import pytest
+
+import tendl_cache
+
+# tendl_cache.fetch against a local HTTP stand-in for the TENDL web site. Every path is given a list of
+# (status, body) answers, one per request, the last one repeating; a negative status stalls the answer.
+
+# ----------------------------------------------------------------------------------------------------
+class Handler(BaseHTTPRequestHandler):
+
+    answers = {}
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(self.path)
+        answers = self.answers.get(self.path, [(404, b'')])
+        status, body = answers.pop(0) if len(answers) > 1 else answers[0]
+
+        if status < 0:
+            time.sleep(-status)
+            return
+
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+# ----------------------------------------------------------------------------------------------------
+@pytest.fixture
+def server():
+
+    Handler.answers = {}
+    Handler.requests = []
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target = httpd.serve_forever, daemon = True).start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}'
+    httpd.shutdown()
+    httpd.server_close()
+
+# ----------------------------------------------------------------------------------------------------
+def test_download_then_cache_hit(server, tmp_path):
+
+    Handler.answers['/xs.tot'] = [(200, b'1 2\n')]
+
+    assert tendl_cache.fetch(server + '/xs.tot', ttl = -1, offline = False, cache_dir = str(tmp_path)) == (200, '1 2\n')
+    assert tendl_cache.fetch(server + '/xs.tot', ttl = -1, offline = False, cache_dir = str(tmp_path)) == (200, '1 2\n')
+    assert Handler.requests == ['/xs.tot']
+
+# ----------------------------------------------------------------------------------------------------
+def test_not_found_is_cached(server, tmp_path):
+
+    assert tendl_cache.fetch(server + '/absent.tot', ttl = -1, offline = False, cache_dir = str(tmp_path)) == (404, '')
+    assert tendl_cache.fetch(server + '/absent.tot', ttl = -1, offline = False, cache_dir = str(tmp_path)) == (404, '')
+    assert Handler.requests == ['/absent.tot']
+
+# ----------------------------------------------------------------------------------------------------
+def test_server_error_is_not_cached(server, tmp_path):
+
+    Handler.answers['/xs.tot'] = [(503, b''), (200, b'1 2\n')]
+
+    assert tendl_cache.fetch(server + '/xs.tot', ttl = -1, offline = False, cache_dir = str(tmp_path))[0] == 503
+    assert tendl_cache.fetch(server + '/xs.tot', ttl = -1, offline = False, cache_dir = str(tmp_path)) == (200, '1 2\n')
+
+# ----------------------------------------------------------------------------------------------------
+def test_stale_copy_is_refreshed(server, tmp_path):
+
+    Handler.answers['/xs.tot'] = [(200, b'1 2\n'), (200, b'3 4\n')]
+
+    tendl_cache.fetch(server + '/xs.tot', ttl = 0, offline = False, cache_dir = str(tmp_path))
+
+    assert tendl_cache.fetch(server + '/xs.tot', ttl = 0, offline = False, cache_dir = str(tmp_path)) == (200, '3 4\n')
+
+# ----------------------------------------------------------------------------------------------------
+def test_timeout_falls_back_to_cached_copy(server, tmp_path):
+
+    Handler.answers['/xs.tot'] = [(200, b'1 2\n'), (-2, b'')]
+
+    tendl_cache.fetch(server + '/xs.tot', ttl = 0, offline = False, cache_dir = str(tmp_path))
+
+    assert tendl_cache.fetch(server + '/xs.tot', ttl = 0, offline = False, cache_dir = str(tmp_path), timeout = 0.2) == (200, '1 2\n')
+
+# ----------------------------------------------------------------------------------------------------
+def test_timeout_without_cached_copy_raises(server, tmp_path):
+
+    import requests
+
+    Handler.answers['/xs.tot'] = [(-2, b'')]
+
+    with pytest.raises(requests.Timeout):
+        tendl_cache.fetch(server + '/xs.tot', ttl = -1, offline = False, cache_dir = str(tmp_path), timeout = 0.2)
+
+# ----------------------------------------------------------------------------------------------------
+def test_offline_cache_miss_raises(tmp_path):
+
+    with pytest.raises(tendl_cache.OfflineCacheMiss):
+        tendl_cache.fetch('http://127.0.0.1:9/xs.tot', offline = True, cache_dir = str(tmp_path))
+
+# ----------------------------------------------------------------------------------------------------
+def test_corrupted_object_is_downloaded_again(server, tmp_path):
+
+    Handler.answers['/xs.tot'] = [(200, b'1 2\n')]
+
+    tendl_cache.fetch(server + '/xs.tot', ttl = -1, offline = False, cache_dir = str(tmp_path))
+    for path in (tmp_path / 'objects').iterdir():
+        path.write_bytes(b'garbage')
+
+    assert tendl_cache.fetch(server + '/xs.tot', ttl = -1, offline = False, cache_dir = str(tmp_path)) == (200, '1 2\n')
+    assert len(Handler.requests) == 2
+
+# ----------------------------------------------------------------------------------------------------
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+import instrumentation
+
+# Compiled form of the v2r4 parameter table: a structured array with one row per nucleus plus a dense
+# (A, Z) -> row index, both stored as .npy files and opened memory-mapped. They are rebuilt
+# automatically whenever the text table changes.
+
+V2R4_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../tables/v2r4/xsect_Gauss2_TALYS-restored.txt')
+CACHE_DIR = os.path.join(os.path.dirname(V2R4_FILE), 'cache')
+
+fields_N = ['tN', 'h1N', 'x1N', 'w1N', 'cN']
+fields_alpha = ['talpha', 'h1alpha', 'x1alpha', 'w1alpha', 'calpha']
+
+dtype = np.dtype([('A', np.int32), ('Z', np.int32)] + [(name, np.float64) for name in fields_N + fields_alpha])
+
+_table = {}
+
+# ----------------------------------------------------------------------------------------------------
+def _paths(text_file, cache_dir):
+
+    name = os.path.splitext(os.path.basename(text_file))[0]
+
+    return [os.path.join(cache_dir, name + suffix) for suffix in ('.npy', '_index.npy', '.json')]
+
+# ----------------------------------------------------------------------------------------------------
+def _stamp(text_file):
+
+    stat = os.stat(text_file)
+
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+# ----------------------------------------------------------------------------------------------------
+def _sha256(text_file):
+
+    with open(text_file, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+# ----------------------------------------------------------------------------------------------------
+def _save_atomic(path, write):
+
+    fd, tmp = tempfile.mkstemp(dir = os.path.dirname(path), prefix = '.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+# ----------------------------------------------------------------------------------------------------
+@instrumentation.timed('parse.v2r4')
+def compile_table(text_file = V2R4_FILE, cache_dir = CACHE_DIR):
+
+    params = np.loadtxt(text_file, skiprows = 2, ndmin = 2)
+
+    table = np.zeros(len(params), dtype = dtype)
+    for icol, name in enumerate(dtype.names):
+        table[name] = params[:, icol]
+
+    index = np.full((table['A'].max() + 1, table['Z'].max() + 1), -1, dtype = np.int32)
+    index[table['A'], table['Z']] = np.arange(len(table), dtype = np.int32)
+
+    table_file, index_file, meta_file = _paths(text_file, cache_dir)
+    meta = dict(_stamp(text_file), sha256 = _sha256(text_file))
+
+    os.makedirs(cache_dir, exist_ok = True)
+    _save_atomic(table_file, lambda f: np.save(f, table))
+    _save_atomic(index_file, lambda f: np.save(f, index))
+    _save_atomic(meta_file, lambda f: f.write(json.dumps(meta).encode()))
+
+    return meta
+
+# ----------------------------------------------------------------------------------------------------
+def _up_to_date(text_file, meta_file):
+
+    try:
+        with open(meta_file) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+
+    stamp = _stamp(text_file)
+    if stamp['size'] == meta['size'] and stamp['mtime_ns'] == meta['mtime_ns']:
+        return True
+
+    # Touched but possibly unchanged: compare contents before recompiling
+    if _sha256(text_file) == meta['sha256']:
+        meta.update(stamp)
+        _save_atomic(meta_file, lambda f: f.write(json.dumps(meta).encode()))
+        return True
+
+    return False
+
+# ----------------------------------------------------------------------------------------------------
+def load_table(text_file = V2R4_FILE, cache_dir = CACHE_DIR):
+
+    # Return the memory-mapped (table, index) pair, compiling or recompiling it if needed
+    table_file, index_file, meta_file = _paths(text_file, cache_dir)
+    stamp = _stamp(text_file)
+
+    key = (os.path.abspath(text_file), cache_dir)
+    if key in _table and _table[key][0] == stamp:
+        return _table[key][1:]
+
+    if not _up_to_date(text_file, meta_file):
+        compile_table(text_file, cache_dir)
+
+    table = np.load(table_file, mmap_mode = 'r')
+    index = np.load(index_file, mmap_mode = 'r')
+    _table[key] = (stamp, table, index)
+
+    return table, index
+
+# ----------------------------------------------------------------------------------------------------
+def find_rows(A, Z, text_file = V2R4_FILE):
+
+    # Row numbers for (arrays of) A and Z, -1 where the nucleus is not in the table
+    table, index = load_table(text_file)
+
+    A = np.asarray(A, dtype = np.int64)
+    Z = np.asarray(Z, dtype = np.int64)
+    inside = (A >= 0) & (A < index.shape[0]) & (Z >= 0) & (Z < index.shape[1])
+
+    return np.where(inside, index[np.where(inside, A, 0), np.where(inside, Z, 0)], -1)
+
+# ----------------------------------------------------------------------------------------------------
+def lookup(A, Z, text_file = V2R4_FILE):
+
+    rows = find_rows(A, Z, text_file)
+
+    if np.ndim(rows) == 0 and rows < 0:
+        raise ValueError(f'No data found for A = {A} and Z = {Z}')
+    elif np.any(rows < 0):
+        raise ValueError(f'No data found for {np.count_nonzero(rows < 0)} of the requested nuclei')
+
+    return load_table(text_file)[0][rows]
+
+# ----------------------------------------------------------------------------------------------------
+def parameters(A, Z, ipart, text_file = V2R4_FILE):
+
+    # (t, h1, x1, w1, c) of the N or alpha channel
+    if ipart == 'N':
+        fields = fields_N
+    elif ipart == 'alpha':
+        fields = fields_alpha
+    else:
+        raise ValueError(f'Invalid particle type: {ipart}')
+
+    row = lookup(A, Z, text_file)
+
+    return tuple(row[name] for name in fields)
+
+# ----------------------------------------------------------------------------------------------------
@@ -1,10 +1,15 @@
-import matplotlib
-matplotlib.use('MacOSX')
-import matplotlib.pyplot as plt
-plt.style.use('simprop.mplstyle')
 import numpy as np
 
-from utils import savefig, set_axes, plot_data, read_talys, read_v2r4
+from utils import pyplot, savefig, set_axes, plot_data, measurements, read_talys, read_v2r4
+
+plt = pyplot()
+
+COLORS = ['tab:orange', 'tab:purple', 'tab:pink', 'tab:olive', 'tab:brown', 'tab:green', 'tab:cyan']
+
+def plot_measurements(ax, A, Z, xlim, exclude=()):
+    """ Plot the EXFOR measurements of nucleus (A, Z) with points in xlim, labelled with their reference. """
+    for i, data in enumerate(measurements(A, Z, energy_range=xlim, exclude=exclude)):
+        plot_data(ax=ax, filename=data['file'], color=COLORS[i % len(COLORS)], label=data['label'], zorder=i + 1)
 
 def plot_exfor_Fe54(output_file='xsecs_pd_Fe54_EXFOR.pdf'):
     """ Plot the cross-sections for a given element (Z, A). """
@@ -12,7 +17,7 @@ def plot_exfor_Fe54(output_file='xsecs_pd_Fe54_EXFOR.pdf'):
     set_axes(ax, xlabel=r'$\epsilon^\prime$ [MeV]', ylabel=r'$\sigma$($\gamma$,X) [mb]',
              xlim=[5, 50], ylim=[0, 180], yscale='linear')
 
-    plot_data(ax=ax, filename='g_Fe54_abs_M0507.004.txt', color='r', label='Norbury+1978')
+    plot_measurements(ax, 54, 26, xlim=[5, 50])
 
     E, sigma = read_talys('talys_g_Fe54_nonelastic.txt')
     ax.plot(E, sigma, color='b', zorder=9, label='TALYS2023', lw=3.5)
@@ -39,11 +44,8 @@ def plot_exfor_Al27(output_file='xsecs_pd_Al27_EXFOR.pdf'):
     set_axes(ax, xlabel=r'$\epsilon^\prime$ [MeV]', ylabel=r'$\sigma$($\gamma$,X) [mb]',
              xlim=[5, 50], ylim=[0, 50], yscale='linear')
 
-    #plot_data(ax=ax, filename='g_Al27_abs_L0083.006', color='tab:gray', label='x', zorder=1)
-    plot_data(ax=ax, filename='g_Al27_abs_L0083.006.txt', color='tab:orange', label='Ahrens+1972', zorder=2)
-    plot_data(ax=ax, filename='g_Al27_abs_L0122.007.txt', color='tab:purple', label='Wyckoff+1965', zorder=3)
-    plot_data(ax=ax, filename='g_Al27_abs_M0188.016.txt', color='tab:pink', label='Ahrens1985', zorder=4)
-    plot_data(ax=ax, filename='g_Al27_abs_M0825.011.txt', color='tab:olive', label='Ahrens+1975', zorder=5)
+    # Of the two Ahrens et al. 1975 sets only M0825.011 is shown, and Ishkhanov et al. 2002 gives no uncertainties
+    plot_measurements(ax, 27, 13, xlim=[5, 50], exclude=['M0825.010', 'M0648.015'])
 
     E, sigma = read_talys('talys_g_Al27_nonelastic.txt')
     ax.plot(E, sigma, color='b', zorder=9, label='TALYS2023', lw=3.5)
@@ -70,8 +72,7 @@ def plot_exfor_Mg24(output_file='xsecs_pd_Mg24_EXFOR.pdf'):
     set_axes(ax, xlabel=r'$\epsilon^\prime$ [MeV]', ylabel=r'$\sigma$($\gamma$,X) [mb]',
              xlim=[5, 50], ylim=[0, 50], yscale='linear')
 
-    plot_data(ax=ax, filename='g_Mg24_abs_M0656.003.txt', color='tab:orange', label='Varlamov+2003', zorder=2)
-    plot_data(ax=ax, filename='g_Mg24_abs_M0727.003.txt', color='tab:purple', label='Dolbilkin+1966', zorder=3)
+    plot_measurements(ax, 24, 12, xlim=[5, 50])
     
     E, sigma = read_talys('talys_g_Mg24_nonelastic.txt')
     ax.plot(E, sigma, color='b', zorder=9, label='TALYS2023', lw=3.5)
@@ -98,9 +99,7 @@ def plot_exfor_O16(output_file='xsecs_pd_O16_EXFOR.pdf'):
     set_axes(ax, xlabel=r'$\epsilon^\prime$ [MeV]', ylabel=r'$\sigma$($\gamma$,X) [mb]',
              xlim=[5, 50], ylim=[0, 35], yscale='linear')
 
-    plot_data(ax=ax, filename='g_O16_abs_L0064.004.txt', color='tab:brown', label='Bezic+1969', zorder=1)
-    plot_data(ax=ax, filename='g_O16_abs_L0083.004.txt', color='tab:green', label='Ahrens+1972', zorder=2)
-    plot_data(ax=ax, filename='g_O16_abs_L0122.004.txt', color='tab:purple', label='Wyckoff+1975', zorder=3)
+    plot_measurements(ax, 16, 8, xlim=[5, 50])
 
     E, sigma = read_talys('talys_g_O16_nonelastic.txt')
     ax.plot(E, sigma, color='b', zorder=9, label='TALYS2023', lw=3.5)
@@ -1,11 +1,9 @@
-import matplotlib
-matplotlib.use('MacOSX')
-import matplotlib.pyplot as plt
-plt.style.use('simprop.mplstyle')
 import numpy as np
 import os
 
-from utils import savefig, set_axes, read_talys
+from utils import pyplot, savefig, set_axes, read_talys
+
+plt = pyplot()
 
 def plot_talys(element_id=(56, 26), output_file='xsecs_pd_TALYS.pdf'):
     """ Plot the cross-sections for a given element (Z, A). """
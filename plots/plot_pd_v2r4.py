@@ -1,11 +1,9 @@
-import matplotlib
-matplotlib.use('MacOSX')
-import matplotlib.pyplot as plt
-plt.style.use('simprop.mplstyle')
 import numpy as np
 import os
 
-from utils import savefig, set_axes, read_v2r4
+from utils import pyplot, savefig, set_axes, read_v2r4
+
+plt = pyplot()
 
 def plot_v2r4(element_id=(56, 26), output_file='xsecs_pd_v2r4.pdf'):
     """ Plot the cross-sections for a given element (Z, A). """
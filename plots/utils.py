@@ -1,6 +1,25 @@
+from __future__ import annotations
+
 import numpy as np
-import matplotlib.pyplot as plt
 import os
+import sys
+from typing import TYPE_CHECKING
+
+# Shared numerical code lives next to the interaction-length scripts
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../luciana/scripts'))
+from exfor_catalog import measurement, measurements
+import plotting
+from v2r4_table import parameters
+
+# Only needed for the annotations: the readers below must stay importable without matplotlib
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
+
+STYLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'simprop.mplstyle')
+
+def pyplot(style: str = STYLE_FILE):
+    """Import matplotlib.pyplot on first use, with the backend chosen by luciana/scripts/plotting.py and the given style sheet."""
+    return plotting.pyplot(style)
 
 def file_exists(filepath):
     """Check if a file exists at the specified path."""
@@ -91,7 +110,8 @@ def plot_data(ax: plt.Axes, filename: str, color: str, label: str, norm: float =
     - zorder: Z-order for layering the plot.
     """
     try:
-        x, y, y_err = np.loadtxt(f'../tables/EXFOR/{filename}', usecols=(0, 1, 2), unpack=True)
+        data = measurement(filename)  # parsed once by the EXFOR catalog (luciana/scripts/exfor_catalog.py)
+        x, y, y_err = data['E'], data['sigma'], data['sigma_error']
     except Exception as e:
         print(f"Error loading data from {filename}: {e}")
         return
@@ -115,32 +135,23 @@ def read_yield(filename):
 
 def read_v2r4(id, doAlpha=False):
     """ Read the cross-section data and return energy (E) and cross-section (s) arrays. """
-    dir_path = '../tables/v2r4/'
-    file_name = 'xsect_Gauss2_TALYS-restored.txt'
-    file_path = os.path.join(dir_path, file_name)
-
-    try:
-        # Select columns based on whether we are using alpha or not
-        cols = (0, 1, 7, 8, 9, 10, 11) if doAlpha else (0, 1, 2, 3, 4, 5, 6)
-        A, Z, tN, h1N, x1N, w1N, cN = np.loadtxt(file_path, skiprows=2, unpack=True, usecols=cols)
-    except Exception as e:
-        print(f"Error reading file {file_path}: {e}")
-        return None, None
-
     # Initialize energy array and cross-section array
     epsilon1 = 30.0 # MeV
     E = np.linspace(0, 100, 1000) # MeV
     s = np.zeros_like(E)
 
-    # Vectorize cross-section calculation for efficiency
-    mask = (A == id[0]) & (Z == id[1])
-    if not np.any(mask):
+    # O(1) lookup in the compiled parameter table (see luciana/scripts/v2r4_table.py)
+    try:
+        tN, h1N, x1N, w1N, cN = parameters(id[0], id[1], 'alpha' if doAlpha else 'N')
+    except ValueError:
         print(f"Error: No data found for id {id}.")
         return E, s
+    except Exception as e:
+        print(f"Error reading v2r4 parameter table: {e}")
+        return None, None
 
-    for i in np.where(mask)[0]:
-        s[E > epsilon1] = cN[i]  # Constant for energies > epsilon1
-        mask_below_epsilon1 = (E > tN[i]) & (E <= epsilon1)
-        s[mask_below_epsilon1] = h1N[i] * np.exp(-(E[mask_below_epsilon1] - x1N[i]) ** 2.0 / w1N[i])
+    s[E > epsilon1] = cN  # Constant for energies > epsilon1
+    mask_below_epsilon1 = (E > tN) & (E <= epsilon1)
+    s[mask_below_epsilon1] = h1N * np.exp(-(E[mask_below_epsilon1] - x1N) ** 2.0 / w1N)
 
     return E, s # MeV, barn
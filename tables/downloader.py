@@ -0,0 +1,109 @@
+import asyncio
+import json
+import os
+import random
+import tempfile
+
+import aiohttp
+
+CONCURRENCY = 32   # simultaneous requests (and pooled keep-alive connections)
+RETRIES = 4        # extra attempts after a network error or a 5xx/429 answer
+BACKOFF = 0.5      # s, doubled at every retry
+SAVE_EVERY = 100   # completed requests between two saves of the resume state
+
+def load_state(state_file):
+    """Load the resume state: URLs already downloaded ('done') or known to be absent ('missing')."""
+    try:
+        with open(state_file) as f:
+            state = json.load(f)
+        return {'done': set(state.get('done', [])), 'missing': set(state.get('missing', []))}
+    except FileNotFoundError:
+        return {'done': set(), 'missing': set()}
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable state file {state_file}: {e}")
+        return {'done': set(), 'missing': set()}
+
+def save_state(state, state_file):
+    """Atomically write the resume state to disk."""
+    _write_atomic(state_file, json.dumps({key: sorted(urls) for key, urls in state.items()}).encode())
+
+def _write_atomic(filepath, data):
+    """Write data to a temporary file next to filepath and rename it, so partial files never appear."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(filepath) or '.', prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, filepath)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+async def _fetch(session, semaphore, url, filepath, retries, backoff):
+    """Download one URL, returning 'done', 'missing' or 'failed'."""
+    for attempt in range(retries + 1):
+        try:
+            async with semaphore:
+                async with session.get(url) as response:
+                    if response.status == 200:
+                        _write_atomic(filepath, await response.read())
+                        return 'done'
+                    if response.status == 404:
+                        return 'missing'
+                    if response.status != 429 and response.status < 500:
+                        print(f"HTTP {response.status} for {url}")
+                        return 'failed'
+                    error = f"HTTP {response.status}"
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error = repr(e)
+        if attempt < retries:
+            await asyncio.sleep(backoff * 2**attempt * (1 + random.random()))
+    print(f"Giving up on {url} after {retries + 1} attempts: {error}")
+    return 'failed'
+
+async def download_all(jobs, state_file, concurrency=CONCURRENCY, retries=RETRIES, backoff=BACKOFF):
+    """
+    Download (url, filepath) jobs concurrently over a pool of keep-alive connections.
+
+    Parameters:
+    - jobs: Iterable of (url, filepath) pairs.
+    - state_file: JSON file recording finished and missing URLs, so an interrupted run can resume.
+    - concurrency: Maximum number of requests in flight.
+    - retries: Extra attempts after a network error or a 5xx/429 answer, with exponential backoff.
+    - backoff: Initial backoff in seconds.
+
+    Returns a dict counting 'done', 'missing', 'failed' and 'skipped' jobs.
+    """
+    state = load_state(state_file)
+    counts = {'done': 0, 'missing': 0, 'failed': 0, 'skipped': 0}
+
+    pending = []
+    for url, filepath in jobs:
+        if url in state['missing'] or os.path.exists(filepath):
+            counts['skipped'] += 1
+        else:
+            pending.append((url, filepath))
+
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency, keepalive_timeout=30)
+    timeout = aiohttp.ClientTimeout(total=60)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        async def run(url, filepath):
+            return url, await _fetch(session, semaphore, url, filepath, retries, backoff)
+
+        try:
+            for icompleted, task in enumerate(asyncio.as_completed([run(*job) for job in pending]), start=1):
+                url, result = await task
+                counts[result] += 1
+                if result in state:
+                    state[result].add(url)
+                if icompleted % SAVE_EVERY == 0:
+                    save_state(state, state_file)
+        finally:
+            save_state(state, state_file)
+
+    return counts
+
+def download(jobs, state_file, **kwargs):
+    """Synchronous wrapper around download_all."""
+    return asyncio.run(download_all(jobs, state_file, **kwargs))
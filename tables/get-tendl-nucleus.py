@@ -1,9 +1,9 @@
 import os
-import wget
 
-from utils import ELEMENTS, stringIt, url_exists
+from downloader import download
+from utils import ELEMENTS, stringIt
 
-TREPO = 'https://tendl.web.psi.ch/tendl_2023/gamma_file'
+TREPO = os.environ.get('TENDL_URL', 'https://tendl.web.psi.ch/tendl_2023/gamma_file')
 OUTDIR = 'TENDL2023'
 
 def count_nucleons(i_n, i_p, i_d, i_t, i_h, i_a):
@@ -21,24 +21,6 @@ def nucleon_combinations(A):
                             if count_nucleons(i_n, i_p, i_d, i_t, i_h, i_a) <= A:
                                 yield i_n, i_p, i_d, i_t, i_h, i_a
 
-def download_file(url, filepath):
-    """Download file if it exists at the URL, otherwise log error."""
-    if os.path.exists(filepath):
-        print(f"File already exists: {filepath}")
-        return False
-    try:
-        if url_exists(url):
-            print(f"Downloading {url}...")
-            wget.download(url, out=filepath)
-            print(f"\nSaved to {filepath}")
-            return True
-        else:
-            print(f"URL not found: {url}")
-            return False
-    except Exception as e:
-        print(f"Error downloading file from {url}: {e}")
-        return False
-
 def get_tables(Z, A):
     """Download all tables for a given nucleus defined by atomic number Z and mass number A."""
     element = stringIt(Z)
@@ -54,18 +36,18 @@ def get_tables(Z, A):
         print(f"Error creating directory '{outdir}': {e}")
         return
 
-    # Track successful downloads
-    download_count = 0
-
+    # All channel tables are fetched concurrently; missing channels are remembered in the state file
+    jobs = []
     for i_n, i_p, i_d, i_t, i_h, i_a in nucleon_combinations(A):
         nucleon_type = f"{i_n}{i_p}{i_d}{i_t}{i_h}{i_a}"
         url = f"{TREPO}/{element}/{element}{str(A).zfill(3)}/tables/xs/xs{nucleon_type}.tot"
         myfname = os.path.join(outdir, f"talys_g_{element}{A}_{nucleon_type}.txt")
+        jobs.append((url, myfname))
 
-        if download_file(url, myfname):
-            download_count += 1
+    counts = download(jobs, os.path.join(outdir, '.download_state.json'))
 
-    print(f"Total files downloaded for {element}-{A}: {download_count}")
+    print(f"Total files downloaded for {element}-{A}: {counts['done']} "
+          f"({counts['skipped']} skipped, {counts['missing']} not in TENDL, {counts['failed']} failed)")
 
 def get_nucleus(pid):
     """Validate input and trigger the download process for the specified nucleus."""
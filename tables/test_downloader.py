@@ -0,0 +1,112 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from downloader import download
+
+# downloader.py against a local HTTP stand-in for the TENDL web site. Every path is given a list of answers,
+# one per request, the last one repeating:
+#   (status, body)              a complete answer
+#   ('partial', body)           headers announcing more bytes than body, then the connection is closed
+
+class Handler(BaseHTTPRequestHandler):
+
+    answers = {}
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(self.path)
+        answers = self.answers.get(self.path, [(404, b'')])
+        status, body = answers.pop(0) if len(answers) > 1 else answers[0]
+
+        if status == 'partial':
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body) + 100))
+            self.end_headers()
+            self.wfile.write(body)
+            self.close_connection = True
+            return
+
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    Handler.answers = {}
+    Handler.requests = []
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}'
+    httpd.shutdown()
+    httpd.server_close()
+
+def run(jobs, tmp_path, **kwargs):
+    return download(jobs, str(tmp_path / 'state.json'), backoff=0., **kwargs)
+
+def leftovers(tmp_path):
+    return [filename for filename in os.listdir(tmp_path) if filename.startswith('.tmp-')]
+
+def test_retry_after_server_errors(server, tmp_path):
+    Handler.answers['/xs.tot'] = [(503, b''), (500, b''), (200, b'1 2\n')]
+    filepath = tmp_path / 'xs.txt'
+
+    counts = run([(server + '/xs.tot', str(filepath))], tmp_path, retries=2)
+
+    assert counts['done'] == 1
+    assert filepath.read_bytes() == b'1 2\n'
+    assert Handler.requests == ['/xs.tot'] * 3
+
+def test_give_up_after_retries(server, tmp_path):
+    Handler.answers['/xs.tot'] = [(503, b'')]
+    filepath = tmp_path / 'xs.txt'
+
+    counts = run([(server + '/xs.tot', str(filepath))], tmp_path, retries=2)
+
+    assert counts['failed'] == 1
+    assert not filepath.exists()
+    assert len(Handler.requests) == 3
+
+def test_partial_file_is_never_written(server, tmp_path):
+    Handler.answers['/xs.tot'] = [('partial', b'1 2\n')]
+    filepath = tmp_path / 'xs.txt'
+
+    counts = run([(server + '/xs.tot', str(filepath))], tmp_path, retries=1)
+
+    assert counts['failed'] == 1
+    assert not filepath.exists()
+    assert leftovers(tmp_path) == []
+
+def test_partial_file_is_retried(server, tmp_path):
+    Handler.answers['/xs.tot'] = [('partial', b'1 2\n'), (200, b'1 2\n3 4\n')]
+    filepath = tmp_path / 'xs.txt'
+
+    counts = run([(server + '/xs.tot', str(filepath))], tmp_path, retries=1)
+
+    assert counts['done'] == 1
+    assert filepath.read_bytes() == b'1 2\n3 4\n'
+
+def test_missing_channels_are_remembered(server, tmp_path):
+    filepath = tmp_path / 'xs.txt'
+    jobs = [(server + '/absent.tot', str(filepath))]
+
+    counts = run(jobs, tmp_path)
+
+    assert counts['missing'] == 1
+    assert not filepath.exists()
+    with open(tmp_path / 'state.json') as f:
+        assert json.load(f)['missing'] == [server + '/absent.tot']
+
+    # A second run skips the channel without asking the server again
+    counts = run(jobs, tmp_path)
+
+    assert counts['skipped'] == 1
+    assert Handler.requests == ['/absent.tot']